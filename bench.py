@@ -0,0 +1,335 @@
+"""
+API Benchmark
+
+Runs the app in-process against a throwaway database seeded with a
+synthetic catalog, drives every endpoint at a fixed concurrency and reports
+throughput and latency percentiles:
+
+    python bench.py
+    python bench.py --careers 50000 --concurrency 64 --duration 10
+    python bench.py --only careers_search,test_submit --compare bench-results/old.json
+
+By default the database is an in-memory stand-in (needs `mongomock-motor`);
+`--mongo-url` points it at a real local server instead, using a scratch
+`careerpath_bench` database that is dropped first. Requests go through
+httpx's ASGI transport (needs `httpx`), so numbers cover the app and the
+database but not the network or the HTTP server.
+
+Results are written as JSON to `bench-results/<time>-<commit>.json`;
+`--compare` prints the change against an earlier result file.
+
+`--memory [N]` instead measures what holding N synthetic careers (100k by
+default) in memory costs as driver dicts, as `Career` models and in the
+columnar catalog store (careerstore.py).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+FIELDS = ["Healthcare", "Trades", "Education", "Design", "Engineering", "Agriculture", "Finance", "Transport"]
+EDUCATION = ["10th Pass", "Intermediate", "ITI", "Diploma", "B.Sc", "B.Tech", "B.Ed / D.Ed", "Degree"]
+JOB_TYPES = ["Government", "Private", "Self-employed"]
+TAGS = ["hands-on", "helping", "teaching", "creative", "logic", "people", "outdoors", "fixing", "numbers"]
+WORDS = ["assistant", "technician", "officer", "operator", "designer", "engineer", "nurse", "teacher",
+         "mechanic", "analyst", "clerk", "inspector", "manager", "trainer", "agent", "surveyor"]
+# Telugu syllables (consonant + vowel sign) for synthetic names
+SYLLABLES = ["క", "కా", "టె", "నర్", "స్",
+             "పి", "ము", "రా", "లో", "వి"]
+ANSWERS = [["fix", "help", "teach", "create"], ["out", "in", "both"], ["pay", "secure", "impact"],
+           ["hands", "people", "logic", "art"], ["govt", "private", "self"]]
+
+
+def synthetic_careers(n: int, rng: random.Random) -> List[dict]:
+    from schemas import Career
+
+    careers = []
+    for i in range(n):
+        name = f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {i}"
+        salary_min = rng.randrange(8000, 60000, 500)
+        careers.append(Career(
+            icon="Briefcase",
+            name_en=name,
+            name_te="".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5))),
+            short_desc_en=f"Work as a {name.lower()} in {rng.choice(FIELDS).lower()}.",
+            short_desc_te="".join(rng.choice(SYLLABLES) for _ in range(8)),
+            salary_min=salary_min,
+            salary_max=salary_min + rng.randrange(5000, 80000, 500),
+            education=rng.choice(EDUCATION),
+            job_type=rng.choice(JOB_TYPES),
+            field=rng.choice(FIELDS),
+            skills=rng.sample(["Communication", "Safety", "Tools", "Patience", "Math", "Design"], 3),
+            tags=rng.sample(TAGS, rng.randint(1, 3)),
+            growth_path_en=["Trainee", "Junior", "Senior"],
+            growth_path_te=["శిక్షణ"],
+        ).model_dump())
+    return careers
+
+
+async def seed(db, args, rng: random.Random) -> Dict[str, list]:
+    from migrations import apply
+    from schemas import Counselor, SavedCareer
+
+    # Test questions and the starter data come from the regular migrations
+    await apply(db)
+    careers = synthetic_careers(args.careers, rng)
+    for i in range(0, len(careers), 5000):
+        await db["career"].insert_many(careers[i:i + 5000])
+    ids = [str(doc["_id"]) async for doc in db["career"].find({}, {"_id": 1})]
+    users = [f"user{i}" for i in range(args.users)]
+    saved = [SavedCareer(user_id=u, career_id=cid).model_dump()
+             for u in users for cid in rng.sample(ids, min(args.saved_per_user, len(ids)))]
+    if saved:
+        await db["savedcareer"].insert_many(saved)
+    counselors = [Counselor(name=f"Counselor {i}", phone=f"90000 {i:05d}", district=rng.choice(FIELDS)).model_dump()
+                  for i in range(args.counselors)]
+    if counselors:
+        await db["counselor"].insert_many(counselors)
+    return {"career_ids": ids, "users": users}
+
+
+def scenarios(data: Dict[str, list], rng: random.Random) -> Dict[str, Callable]:
+    """Request factories by scenario name; each returns (method, url, json body)"""
+    ids, users = data["career_ids"], data["users"]
+
+    def answers():
+        return [rng.choice(step) for step in ANSWERS]
+
+    return {
+        "careers_all": lambda: ("GET", "/api/careers", None),
+        "careers_search": lambda: ("GET", f"/api/careers?q={rng.choice(WORDS)}", None),
+        "careers_prefix": lambda: ("GET", f"/api/careers?q={rng.choice(WORDS)[:3]}", None),
+        "careers_telugu": lambda: ("GET", f"/api/careers?q={rng.choice(SYLLABLES)}", None),
+        "careers_filter": lambda: ("GET", f"/api/careers?field={rng.choice(FIELDS)}&edu={rng.choice(EDUCATION)[:3]}", None),
+        "careers_fields": lambda: ("GET", "/api/careers?fields=name_en,name_te,icon&limit=200", None),
+        "career_detail": lambda: ("GET", f"/api/careers/{rng.choice(ids)}", None),
+        "careers_batch": lambda: ("POST", "/api/careers:batch", {"ids": rng.sample(ids, min(50, len(ids)))}),
+        "test_questions": lambda: ("GET", "/api/test/questions", None),
+        "test_submit": lambda: ("POST", "/api/test/submit", {"user_id": rng.choice(users), "answers": answers()}),
+        "save": lambda: ("POST", "/api/save", {"user_id": rng.choice(users), "career_id": rng.choice(ids)}),
+        "saved_list": lambda: ("GET", f"/api/saved/{rng.choice(users)}?embed=true", None),
+        "counselors": lambda: ("GET", "/api/counselors", None),
+        "contact": lambda: ("POST", "/api/contact", {"name": "Bench", "email": "bench@example.com", "message": "hello"}),
+    }
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    i = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[i]
+
+
+async def drive(client, make: Callable, concurrency: int, duration: float) -> dict:
+    """Run `make` requests from `concurrency` loops for `duration` seconds"""
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    deadline = time.perf_counter() + duration
+
+    async def loop():
+        while time.perf_counter() < deadline:
+            method, url, body = make()
+            started = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            await response.aread()
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(loop() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    ms = [1000 * v for v in latencies]
+    return {
+        "requests": len(ms),
+        "rps": round(len(ms) / elapsed, 1),
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "mean_ms": round(statistics.fmean(ms), 3) if ms else 0.0,
+        "max_ms": round(ms[-1], 3) if ms else 0.0,
+        "status": {str(k): v for k, v in sorted(statuses.items())},
+    }
+
+
+def open_database(mongo_url: str):
+    """Point the app at the benchmark database; must run before importing main"""
+    if mongo_url:
+        os.environ["DATABASE_URL"] = mongo_url
+        os.environ["DATABASE_NAME"] = "careerpath_bench"
+        import database
+        return database.db
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        raise SystemExit("The in-memory database needs mongomock-motor (pip install mongomock-motor), "
+                         "or pass --mongo-url")
+    import database
+    database.db = AsyncMongoMockClient()["careerpath_bench"]
+    return database.db
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run(args) -> dict:
+    try:
+        import httpx
+    except ImportError:
+        raise SystemExit("The benchmark needs httpx (pip install httpx)")
+
+    db = open_database(args.mongo_url)
+    if args.mongo_url:
+        await db.client.drop_database(db.name)
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    data = await seed(db, args, rng)
+    print(f"Seeded {args.careers} careers in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    import main
+    main.db = db
+    table = scenarios(data, rng)
+    names = args.only.split(",") if args.only else list(table)
+    unknown = set(names) - set(table)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name in names:
+                # Warm caches and lazy state so they do not skew the first samples
+                await drive(client, table[name], 1, args.warmup)
+                results[name] = await drive(client, table[name], args.concurrency, args.duration)
+                r = results[name]
+                print(f"{name:16} {r['rps']:>9.1f} req/s  p50 {r['p50_ms']:8.2f}ms  "
+                      f"p95 {r['p95_ms']:8.2f}ms  p99 {r['p99_ms']:8.2f}ms  {r['status']}", file=sys.stderr)
+
+    return {
+        "commit": git_commit(),
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "database": "mongodb" if args.mongo_url else "mongomock",
+        "params": {"careers": args.careers, "users": args.users, "saved_per_user": args.saved_per_user,
+                   "counselors": args.counselors, "concurrency": args.concurrency,
+                   "duration": args.duration, "seed": args.seed},
+        "results": results,
+    }
+
+
+def retained(build: Callable[[], object]) -> int:
+    """Bytes still allocated by the object `build` returns"""
+    import gc
+    import tracemalloc
+
+    gc.collect()
+    tracemalloc.start()
+    kept = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def memory(args) -> dict:
+    import bson
+
+    from catalog import FIELDS
+    from careerstore import CareerStore
+    from schemas import Career
+
+    rng = random.Random(args.seed)
+    # Decoding BSON gives every document its own strings, as the driver does
+    encoded = [bson.encode({"id": f"{i:024x}", **{name: c[name] for name in FIELDS}})
+               for i, c in enumerate(synthetic_careers(args.memory, rng))]
+
+    def columns():
+        store = CareerStore(FIELDS)
+        for n, raw in enumerate(encoded):
+            store.put(n, bson.decode(raw))
+        return store
+
+    builds = {
+        "dicts": lambda: [bson.decode(raw) for raw in encoded],
+        "models": lambda: [Career(**bson.decode(raw)) for raw in encoded],
+        "columns": columns,
+    }
+    results = {}
+    for name, build in builds.items():
+        size = retained(build)
+        results[name] = {"bytes": size, "bytes_per_career": round(size / args.memory, 1),
+                         "mb_per_100k": round(size / args.memory * 100_000 / 2 ** 20, 1)}
+        print(f"{name:8} {results[name]['bytes_per_career']:>8.1f} B/career  "
+              f"{results[name]['mb_per_100k']:>7.1f} MB per 100k", file=sys.stderr)
+    return {
+        "commit": git_commit(),
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "params": {"careers": args.memory, "seed": args.seed},
+        "memory": results,
+        "results": {},
+    }
+
+
+def compare(current: dict, path: str):
+    with open(path) as f:
+        previous = json.load(f)
+    print(f"\nvs {previous.get('commit')} ({path})", file=sys.stderr)
+    for name, r in current["results"].items():
+        old = previous.get("results", {}).get(name)
+        if not old:
+            continue
+        changes = []
+        for metric in ("rps", "p50_ms", "p99_ms"):
+            if old[metric]:
+                changes.append(f"{metric} {100 * (r[metric] - old[metric]) / old[metric]:+6.1f}%")
+        print(f"{name:16} " + "  ".join(changes), file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the API endpoints")
+    parser.add_argument("--careers", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--saved-per-user", type=int, default=10)
+    parser.add_argument("--counselors", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=0.5, help="seconds of warm-up per scenario")
+    parser.add_argument("--only", help="comma-separated scenario names")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--mongo-url", help="benchmark against this MongoDB server instead of the in-memory stand-in")
+    parser.add_argument("--out", help="result file (default bench-results/<time>-<commit>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    parser.add_argument("--memory", type=int, nargs="?", const=100_000, metavar="CAREERS",
+                        help="measure catalog memory per representation instead of request throughput")
+    args = parser.parse_args(argv)
+
+    result = memory(args) if args.memory else asyncio.run(run(args))
+    out = args.out
+    if not out:
+        os.makedirs("bench-results", exist_ok=True)
+        out = os.path.join("bench-results", f"{datetime.now():%Y%m%d-%H%M%S}-{result['commit']}.json")
+    with open(out, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"Results written to {out}", file=sys.stderr)
+    if args.compare:
+        compare(result, args.compare)
+
+
+if __name__ == "__main__":
+    main()
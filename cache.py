@@ -0,0 +1,210 @@
+"""
+Response Cache
+
+Caches computed responses of read-mostly endpoints. Entries live in a
+namespace named after the collection they were built from; writing to that
+collection invalidates the namespace. Concurrent misses on the same key are
+collapsed into a single load (single-flight).
+
+Backends:
+    memory  In-process LRU with a TTL (default)
+    redis   Shared across workers; needs the optional `redis` package and
+            CACHE_URL. Falls back to memory when unavailable. Only
+            holds bytes, so cache encoded response bodies.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_URL = os.getenv("CACHE_URL")
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "60"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+
+
+def make_key(**params) -> str:
+    """Stable cache key from query parameters; empty values are ignored"""
+    parts = []
+    for name in sorted(params):
+        value = params[name]
+        if isinstance(value, str):
+            value = value.strip()
+        if value is None or value == "":
+            continue
+        parts.append(f"{name}={value}")
+    return "&".join(parts)
+
+
+class MemoryBackend:
+    """LRU + TTL store for one process"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    async def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    async def delete_namespace(self, namespace: str):
+        self.clear_namespace(namespace)
+
+    def clear_namespace(self, namespace: str):
+        prefix = namespace + ":"
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "entries": len(self._data),
+                "evictions": self.evictions, "expirations": self.expirations}
+
+
+class RedisBackend:
+    """Shared store for encoded (bytes) values with a server-side TTL"""
+
+    def __init__(self, url: str, prefix: str = "careerpath:"):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self._prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._redis.get(self._prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self._redis.set(self._prefix + key, value, px=int(ttl * 1000))
+
+    async def delete_namespace(self, namespace: str):
+        keys = [k async for k in self._redis.scan_iter(match=f"{self._prefix}{namespace}:*")]
+        if keys:
+            await self._redis.delete(*keys)
+
+    def stats(self) -> dict:
+        # Evictions and expirations happen server-side (see INFO stats)
+        return {"backend": "redis"}
+
+
+def create_backend():
+    if CACHE_BACKEND == "redis":
+        if not CACHE_URL:
+            logger.warning("CACHE_BACKEND=redis without CACHE_URL, using the memory cache")
+        else:
+            try:
+                return RedisBackend(CACHE_URL)
+            except ImportError:
+                logger.warning("redis package not installed, using the memory cache")
+    return MemoryBackend()
+
+
+class ResponseCache:
+    """Namespaced cache with single-flight loads and write invalidation"""
+
+    def __init__(self, backend=None, ttl: float = CACHE_TTL_SECONDS):
+        self.backend = backend or create_backend()
+        self.ttl = ttl
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._generation: Dict[str, int] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get_or_load(self, namespace: str, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Cached value for key, loading it once if missing
+
+        A loader result of None is returned but not cached.
+        """
+        self._loop = asyncio.get_running_loop()
+        full_key = f"{namespace}:{key}"
+        value = await self.backend.get(full_key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+
+        inflight = self._inflight.get(full_key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = self._loop.create_future()
+        self._inflight[full_key] = future
+        generation = self._generation.get(namespace, 0)
+        try:
+            value = await loader()
+            # Skip the store if the namespace was invalidated mid-load
+            if value is not None and self._generation.get(namespace, 0) == generation:
+                await self.backend.set(full_key, value, self.ttl)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            del self._inflight[full_key]
+
+    async def peek(self, namespace: str, key: str) -> Optional[Any]:
+        """Cached value for key or None, without loading"""
+        value = await self.backend.get(f"{namespace}:{key}")
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def put(self, namespace: str, key: str, value: Any):
+        await self.backend.set(f"{namespace}:{key}", value, self.ttl)
+
+    def invalidate(self, namespace: str):
+        """Drop every entry of a namespace; safe to call from any thread"""
+        self._generation[namespace] = self._generation.get(namespace, 0) + 1
+        self.invalidations += 1
+        if isinstance(self.backend, MemoryBackend):
+            self.backend.clear_namespace(namespace)
+            return
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            loop.create_task(self.backend.delete_namespace(namespace))
+        else:
+            asyncio.run_coroutine_threadsafe(self.backend.delete_namespace(namespace), loop)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses,
+                "invalidations": self.invalidations, **self.backend.stats()}
+
+
+response_cache = ResponseCache()
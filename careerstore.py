@@ -0,0 +1,224 @@
+"""
+Columnar Career Store
+
+Compact in-memory form of career documents for the catalog. A dict per
+career costs a hash table plus separate objects for every value (several KB
+per career). Here every Career field is one column instead:
+
+- int fields (salaries) are one `array("q")`
+- low-cardinality strings (icon, education, job_type, field) are interned:
+  each distinct value is kept once and rows hold an `array("I")` of codes
+- list fields (skills, tags) are packed as ids into a shared vocabulary,
+  with one (start, length) span per row
+- other strings (names, descriptions) are one list of str
+
+Rows are addressed by a dense integer (the catalog ordinal) and read
+through `CareerRow`, a read-only mapping view with two slots, so code
+written against dicts (`doc["id"]`, `doc.get("field")`, `CareerCard(**doc)`)
+works unchanged. The columns are derived from schemas.Career.
+
+Rewriting a row's lists appends the new ids and leaves the old ones
+behind; they are compacted away once they outweigh the live ones.
+"""
+
+import typing
+from array import array
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from schemas import Career
+
+# String fields with few distinct values, kept once each
+INTERNED = ("icon", "education", "job_type", "field")
+
+# Career ints are non-negative, so -1 marks a missing value
+_MISSING = -1
+# A span packs a row's list as start << 16 | length in one word, so a
+# reader in another thread never sees the start of one write and the
+# length of another
+_LENGTH_BITS = 16
+
+
+def _put(column, n: int, value, fill):
+    if n < len(column):
+        column[n] = value
+    else:
+        column.extend([fill] * (n - len(column)))
+        column.append(value)
+
+
+class _Vocabulary:
+    """Distinct strings, each stored once, with integer codes"""
+
+    def __init__(self):
+        self.values: List[Optional[str]] = [None]
+        self._codes: Dict[str, int] = {}
+
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return 0
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class _Ints:
+    def __init__(self):
+        self.data = array("q")
+
+    def set(self, n: int, value: Optional[int]):
+        _put(self.data, n, _MISSING if value is None else value, _MISSING)
+
+    def get(self, n: int) -> Optional[int]:
+        value = self.data[n]
+        return None if value == _MISSING else value
+
+
+class _Strings:
+    def __init__(self):
+        self.data: List[Optional[str]] = []
+
+    def set(self, n: int, value: Optional[str]):
+        _put(self.data, n, value, None)
+
+    def get(self, n: int) -> Optional[str]:
+        return self.data[n]
+
+
+class _Interned:
+    def __init__(self):
+        self.vocab = _Vocabulary()
+        self.codes = array("I")
+
+    def set(self, n: int, value: Optional[str]):
+        _put(self.codes, n, self.vocab.code(value), 0)
+
+    def get(self, n: int) -> Optional[str]:
+        return self.vocab.values[self.codes[n]]
+
+
+class _Packed:
+    def __init__(self, vocab: _Vocabulary):
+        self.vocab = vocab
+        # (ids, spans) replaced together when compacting
+        self.data = (array("I"), array("Q"))
+        self.garbage = 0
+
+    def set(self, n: int, values: Optional[Iterable[str]]):
+        ids, spans = self.data
+        if n < len(spans):
+            self.garbage += spans[n] & ((1 << _LENGTH_BITS) - 1)
+        start = len(ids)
+        ids.extend(self.vocab.code(v) for v in values or ())
+        _put(spans, n, start << _LENGTH_BITS | (len(ids) - start), 0)
+        if self.garbage > 1024 and self.garbage > len(ids) // 2:
+            self._compact()
+
+    def get(self, n: int) -> List[str]:
+        ids, spans = self.data
+        span = spans[n]
+        start = span >> _LENGTH_BITS
+        values = self.vocab.values
+        return [values[i] for i in ids[start:start + (span & ((1 << _LENGTH_BITS) - 1))]]
+
+    def _compact(self):
+        ids, spans = self.data
+        fresh_ids, fresh_spans = array("I"), array("Q")
+        for span in spans:
+            start, length = span >> _LENGTH_BITS, span & ((1 << _LENGTH_BITS) - 1)
+            fresh_spans.append(len(fresh_ids) << _LENGTH_BITS | length)
+            fresh_ids.extend(ids[start:start + length])
+        self.data = (fresh_ids, fresh_spans)
+        self.garbage = 0
+
+
+def _column(name: str, annotation, vocab: _Vocabulary):
+    if annotation is int:
+        return _Ints()
+    if typing.get_origin(annotation) is list:
+        return _Packed(vocab)
+    if name in INTERNED or typing.get_origin(annotation) is typing.Literal:
+        return _Interned()
+    return _Strings()
+
+
+class CareerStore:
+    """Career fields as columns, one row per catalog ordinal"""
+
+    def __init__(self, fields: Iterable[str] = tuple(Career.model_fields)):
+        vocab = _Vocabulary()
+        self.fields = ("id",) + tuple(fields)
+        self._columns = {"id": _Strings()}
+        for name in fields:
+            self._columns[name] = _column(name, Career.model_fields[name].annotation, vocab)
+
+    def normalize(self, doc: dict) -> dict:
+        """`doc` with whole-number doubles in int fields made ints
+
+        Raises ValueError for int fields that are fractional, negative or
+        not numbers.
+        """
+        for name, column in self._columns.items():
+            value = doc.get(name)
+            if not isinstance(column, _Ints) or value is None:
+                continue
+            if isinstance(value, float) and value.is_integer():
+                value = doc[name] = int(value)
+            if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+                raise ValueError(f"{name} is not a non-negative whole number: {value!r}")
+        return doc
+
+    def put(self, n: int, doc: dict):
+        """Write row `n` from a normalized document (missing fields are stored as missing)"""
+        for name, column in self._columns.items():
+            column.set(n, doc.get(name))
+
+    def clear(self, n: int):
+        for column in self._columns.values():
+            column.set(n, None)
+
+    def value(self, n: int, name: str):
+        """A field of row `n`; KeyError if the row does not have it"""
+        value = self._columns[name].get(n)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def where(self, name: str, predicate: Callable[[str], bool]) -> Callable[[int], bool]:
+        """Row test on an interned field, calling `predicate` once per distinct value"""
+        column = self._columns[name]
+        wanted = {code for code, value in enumerate(column.vocab.values) if value is not None and predicate(value)}
+        codes = column.codes
+        return lambda n: codes[n] in wanted
+
+    def row(self, n: int) -> "CareerRow":
+        return CareerRow(self, n)
+
+
+class CareerRow(Mapping):
+    """Read-only dict-like view of one store row"""
+
+    __slots__ = ("_store", "_n")
+
+    def __init__(self, store: CareerStore, n: int):
+        self._store = store
+        self._n = n
+
+    def __getitem__(self, name: str):
+        return self._store.value(self._n, name)
+
+    def get(self, name: str, default=None):
+        column = self._store._columns.get(name)
+        value = column.get(self._n) if column is not None else None
+        return default if value is None else value
+
+    def __iter__(self) -> Iterator[str]:
+        return (name for name in self._store.fields if self.get(name) is not None)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"CareerRow({dict(self)!r})"
@@ -0,0 +1,449 @@
+"""
+Career Catalog
+
+In-process copy of the `career` collection with a token inverted index, so
+/api/careers search is answered from memory instead of a `$regex` scan.
+Telugu names get a grapheme n-gram index and a romanized key index (see
+telugu.py) so partial Telugu input and transliterated queries also match.
+The catalog is loaded at startup and kept current from a change stream
+(or a periodic reload when the server does not support change streams).
+Documents are held column-wise (see careerstore.py) and handed out as
+read-only dict-like row views.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import threading
+from bisect import bisect_left, insort
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from careerstore import CareerRow, CareerStore
+from telugu import has_telugu, latin_index, latin_key, normalize, romanized_keys, telugu_index
+
+logger = logging.getLogger(__name__)
+
+# Word characters plus the Telugu block (vowel signs and virama are combining
+# marks, which `\w` alone would split on) and zero-width (non-)joiners.
+_TOKEN_RE = re.compile(r"[\w\u0C00-\u0C7F\u200c\u200d]+", re.UNICODE)
+
+REFRESH_SECONDS = int(os.getenv("CATALOG_REFRESH_SECONDS", "60"))
+# Wait before reopening a failed change stream
+RETRY_SECONDS = 1
+# Prefixes matching more tokens than this are tested per career, not unioned
+PREFIX_FANOUT = 64
+
+# Fields kept in memory: the list card plus what search and recommendations
+# use. Growth paths are only needed by the detail endpoint, which reads Mongo.
+FIELDS = ("icon", "name_en", "name_te", "short_desc_en", "short_desc_te", "salary_min",
+          "salary_max", "education", "job_type", "field", "skills", "tags")
+PROJECTION = {name: 1 for name in FIELDS}
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split text into lowercase search tokens"""
+    if not text:
+        return []
+    return _TOKEN_RE.findall(normalize(text))
+
+
+def doc_tokens(doc: dict) -> Set[str]:
+    """All index tokens for a career document"""
+    tokens = set()
+    for key in ("name_en", "name_te", "field"):
+        tokens.update(tokenize(doc.get(key)))
+    for key in ("tags", "skills"):
+        for value in doc.get(key) or []:
+            tokens.update(tokenize(value))
+            # Keep the whole tag as well so `?q=hands-on` still matches exactly
+            tokens.add(value.lower())
+    return tokens
+
+
+# Candidate ordinal sets that hold every match (None: the whole catalog)
+# and a test that decides membership on its own (None: being in one of the
+# sets is enough)
+Match = Tuple[Optional[List[Set[int]]], Optional[Callable[[int], bool]]]
+
+
+def _membership(candidates: List[Set[int]], test: Optional[Callable[[int], bool]]) -> Callable[[int], bool]:
+    """`test`, or membership in one of the candidate sets when there is none"""
+    if test is not None:
+        return test
+    if len(candidates) == 1:
+        return candidates[0].__contains__
+    return lambda n: any(n in s for s in candidates)
+
+
+def _either(a: Match, b: Match) -> Match:
+    """Ordinals matching `a` or `b`"""
+    in_a = _membership(*a)
+    in_b = _membership(*b)
+    candidates = None if a[0] is None or b[0] is None else a[0] + b[0]
+    return candidates, lambda n: in_a(n) or in_b(n)
+
+
+class CareerCatalog:
+    """Career documents keyed by id with an inverted token index"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._task = None
+        self.version = 0
+        # Called with no arguments whenever the catalog content changes
+        self.listeners: List[Callable[[], None]] = []
+        # Encodes a career document to its list-card JSON (set by the app)
+        self.card_encoder: Optional[Callable[[dict], bytes]] = None
+        self._clear()
+
+    def _clear(self):
+        self._store = CareerStore(FIELDS)
+        self._ord: Dict[str, int] = {}
+        self._ids: Dict[int, str] = {}
+        self._tokens: Dict[int, Set[str]] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._vocab: List[str] = []
+        self._by_field: Dict[str, Set[int]] = {}
+        self._short: Dict[str, Set[int]] = {}
+        self._cards: Dict[str, bytes] = {}
+        self._te = telugu_index()
+        self._rom = latin_index()
+        self._next = 0
+
+    def __len__(self):
+        return len(self._ids)
+
+    def get(self, career_id: str) -> Optional[CareerRow]:
+        n = self._ord.get(career_id)
+        return self._store.row(n) if n is not None else None
+
+    def card_json(self, doc: dict) -> bytes:
+        """Encoded card for a catalog document, computed once per version of the doc"""
+        card = self._cards.get(doc["id"])
+        if card is None:
+            card = self._cards[doc["id"]] = self.card_encoder(doc)
+        return card
+
+    def rows(self) -> List[CareerRow]:
+        """All careers in catalog order"""
+        with self._lock:
+            return [self._store.row(n) for n in self._ids]
+
+    # Index maintenance
+    def load(self, docs: Iterable[dict]) -> bool:
+        """Replace the whole catalog; False if the documents are unchanged
+
+        The new index is built aside and swapped in, so searches keep being
+        served from the old one while a reload is running. Reloading the same
+        documents swaps nothing and notifies no listeners, so periodic
+        reloads keep caches and derived data.
+        """
+        prepared = []
+        for doc in docs:
+            try:
+                prepared.append(self._prepare(doc))
+            except ValueError as e:
+                logger.warning("Skipping career %s: %s", doc.get("_id", doc.get("id")), e)
+        if self._unchanged(prepared):
+            return False
+        fresh = CareerCatalog()
+        for doc in prepared:
+            fresh._add(doc, bulk=True)
+        fresh._vocab = sorted(fresh._postings)
+        with self._lock:
+            for name, value in vars(fresh).items():
+                if name not in ("_lock", "_task", "version", "listeners", "card_encoder"):
+                    setattr(self, name, value)
+            self._changed()
+        return True
+
+    def _unchanged(self, docs: List[dict]) -> bool:
+        """Whether the catalog holds exactly these prepared documents, in this order"""
+        rows = self.rows()
+        return len(rows) == len(docs) and all(
+            row.get(name) == doc.get(name) for row, doc in zip(rows, docs) for name in self._store.fields)
+
+    def upsert(self, doc: dict):
+        with self._lock:
+            try:
+                doc = self._prepare(doc)
+            except ValueError as e:
+                logger.warning("Dropping career %s from the catalog: %s", doc.get("_id", doc.get("id")), e)
+                self.remove(str(doc["_id"]) if "_id" in doc else doc["id"])
+                return
+            if doc["id"] in self._ord:
+                self._remove(doc["id"], keep_order=True)
+            self._add(doc)
+            self._changed()
+
+    def remove(self, career_id: str):
+        with self._lock:
+            if career_id in self._ord:
+                self._remove(career_id)
+                self._changed()
+
+    def _changed(self):
+        self.version += 1
+        for listener in self.listeners:
+            listener()
+
+    def _prepare(self, doc: dict) -> dict:
+        """The catalog fields of a document; ValueError if it cannot be stored"""
+        career_id = str(doc["_id"]) if "_id" in doc else doc["id"]
+        doc = {name: doc[name] for name in FIELDS if name in doc}
+        doc["id"] = career_id
+        return self._store.normalize(doc)
+
+    def _add(self, doc: dict, bulk: bool = False):
+        career_id = doc["id"]
+        n = self._ord.get(career_id)
+        if n is None:
+            n = self._next
+            self._next += 1
+            self._ord[career_id] = n
+            self._ids[n] = career_id
+        self._store.put(n, doc)
+        self._short.clear()
+        tokens = doc_tokens(doc)
+        self._tokens[n] = tokens
+        for token in tokens:
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = set()
+                if not bulk:
+                    insort(self._vocab, token)
+            posting.add(n)
+        self._by_field.setdefault(doc.get("field"), set()).add(n)
+        self._te.add(n, normalize(doc.get("name_te")))
+        self._rom.add(n, romanized_keys([doc.get("name_te")]))
+
+    def _remove(self, career_id: str, keep_order: bool = False):
+        n = self._ord[career_id]
+        self._cards.pop(career_id, None)
+        self._short.clear()
+        for token in self._tokens.pop(n):
+            posting = self._postings[token]
+            posting.discard(n)
+            if not posting:
+                del self._postings[token]
+                del self._vocab[bisect_left(self._vocab, token)]
+        field = self._by_field.get(self._store.row(n).get("field"))
+        if field is not None:
+            field.discard(n)
+        self._te.remove(n)
+        self._rom.remove(n)
+        if not keep_order:
+            self._store.clear(n)
+            del self._ord[career_id]
+            del self._ids[n]
+
+    # Queries
+    def _prefix(self, prefix: str) -> Match:
+        """Ordinals with a token starting with prefix"""
+        # One- and two-letter prefixes fan out over much of the vocabulary,
+        # so their unions are kept until the next catalog change.
+        if len(prefix) <= 2 and prefix in self._short:
+            return [self._short[prefix]], None
+        vocab = self._vocab
+        i = bisect_left(vocab, prefix)
+        end = bisect_left(vocab, prefix[:-1] + chr(ord(prefix[-1]) + 1), i)
+        if len(prefix) > 2 and end - i > PREFIX_FANOUT:
+            # Too many tokens to union for one query: test the careers walked
+            tokens = self._tokens
+            return None, lambda n: any(t.startswith(prefix) for t in tokens.get(n, ()))
+        matched = set().union(*(self._postings[vocab[j]] for j in range(i, end)))
+        if len(prefix) <= 2:
+            self._short[prefix] = matched
+        return [matched], None
+
+    def match(self, q: str) -> Match:
+        """Ordinals matching the query by token, Telugu n-grams or romanized key
+
+        Returns candidate sets that together hold every match (None for the
+        whole catalog) and a test a candidate must pass (None when being in a
+        set is enough). Work that does not narrow the candidates cheaply,
+        such as checking n-gram hits against the text, is left to the test,
+        so a search only does it for the careers it walks to fill a page.
+        """
+        if not normalize(q).strip():
+            # Nothing left to look for, e.g. only zero-width joiners
+            return [set()], None
+        tokens = self._match_tokens(q)
+        if has_telugu(q):
+            index, key = self._te, normalize(q)
+        else:
+            # Very short romanized keys are too loose to be useful
+            index, key = self._rom, latin_key(q)
+            if len(key) < 3:
+                return tokens
+        grams, verify = index.plan(key)
+        if not grams:
+            return tokens
+        first, rest = grams[0], grams[1:]
+
+        def in_text(n: int) -> bool:
+            return n in first and all(n in s for s in rest) and (not verify or index.contains(n, key))
+
+        text = ([first], in_text if rest or verify else None)
+        if tokens[0] is not None and not any(tokens[0]):
+            return text
+        return _either(tokens, text)
+
+    def _match_tokens(self, q: str) -> Match:
+        """Ordinals matching the query tokens
+
+        Completed words must match a token exactly; the last word is matched
+        as a prefix so partial input works for type-ahead. A query that
+        splits into several words also matches a whole-tag token such as
+        `hands-on`.
+        """
+        tokens = tokenize(q) or [normalize(q)]
+        found = self._match_words(tokens)
+        if len(tokens) > 1:
+            whole = self._postings.get(normalize(q).strip())
+            if whole:
+                return _either(found, ([whole], None))
+        return found
+
+    def _match_words(self, tokens: List[str]) -> Match:
+        hits = [self._postings.get(t, set()) for t in tokens[:-1]]
+        prefix, prefix_test = self._prefix(tokens[-1])
+        if prefix is not None:
+            hits.extend(prefix)
+        if not hits:
+            return None, prefix_test
+        hits.sort(key=len)
+        result = hits[0]
+        for other in hits[1:]:
+            if not result:
+                break
+            result = result & other
+        if prefix_test is None or not result:
+            return [result], None
+        return [result], lambda n: n in result and prefix_test(n)
+
+    def _start(self, after: Optional[str]) -> int:
+        """First ordinal past the career id `after`"""
+        if after is None:
+            return 0
+        n = self._ord.get(after)
+        if n is not None:
+            return n + 1
+        # The cursor's career is gone; resume at the next larger id
+        for n, career_id in self._ids.items():
+            if career_id > after:
+                return n
+        return self._next
+
+    def _in_order(self, candidates: Optional[List[Set[int]]], test: Optional[Callable[[int], bool]],
+                  limit: int, start: int) -> Iterable[int]:
+        """Ordinals from `start` on, in catalog order, matching (candidates, test)"""
+        if candidates is None:
+            walk = (n for n in range(start, self._next) if n in self._ids)
+            return filter(test, walk) if test is not None else walk
+        test = _membership(candidates, test)
+        size = sum(len(s) for s in candidates)
+        if size * size > limit * len(self._ids):
+            # Dense result: walking the catalog finds `limit` hits quickly
+            return filter(test, range(start, self._next))
+        ordered = sorted(set().union(*candidates))
+        return filter(test, ordered[bisect_left(ordered, start):])
+
+    def search(self, q: Optional[str] = None, field: Optional[str] = None,
+               edu: Optional[str] = None, limit: int = 60, after: Optional[str] = None) -> List[CareerRow]:
+        """Careers matching all given filters, in catalog (`_id`) order
+
+        `after` is the id of the last career of the previous page; the page
+        starts right after it without walking the earlier results.
+        """
+        with self._lock:
+            candidates, test = None, None
+            if q:
+                candidates, test = self.match(q)
+            if field:
+                by_field = self._by_field.get(field, set())
+                if candidates is None and test is None:
+                    candidates = [by_field]
+                elif test is None and len(candidates) == 1:
+                    candidates = [candidates[0] & by_field]
+                else:
+                    matches = _membership(candidates, test)
+                    test = lambda n: n in by_field and matches(n)
+                    if candidates is None or len(by_field) < sum(len(s) for s in candidates):
+                        candidates = [by_field]
+            start = self._start(after)
+            ordered = self._in_order(candidates, test, limit, start)
+            if edu:
+                edu_l = edu.lower()
+                ordered = filter(self._store.where("education", lambda value: edu_l in value.lower()), ordered)
+            return [self._store.row(n) for n in islice(ordered, limit)]
+
+    # Refresh
+    def apply_change(self, change: dict):
+        """Apply a single change stream event"""
+        op = change.get("operationType")
+        if op in ("insert", "replace", "update"):
+            doc = change.get("fullDocument")
+            if doc is not None:
+                self.upsert(doc)
+            else:
+                self.remove(str(change["documentKey"]["_id"]))
+        elif op == "delete":
+            self.remove(str(change["documentKey"]["_id"]))
+        elif op in ("drop", "invalidate"):
+            self.load([])
+
+    async def refresh(self, collection):
+        """Reload the whole catalog from a Motor collection
+
+        Loading in `_id` order makes catalog order match the pagination key.
+        """
+        docs = await collection.find({}, PROJECTION).sort("_id", 1).to_list(length=None)
+        await asyncio.to_thread(self.load, docs)
+
+    def watch(self, collection):
+        """Keep the catalog in sync with a Motor collection in a background task"""
+        if self._task is not None:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._follow(collection))
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _follow(self, collection):
+        from pymongo.errors import OperationFailure, PyMongoError
+
+        opened = False
+        while True:
+            try:
+                async with collection.watch(full_document="updateLookup") as stream:
+                    opened = True
+                    # Reload once the stream is open: a catalog loaded earlier (before
+                    # a fork, or by the startup hook) may miss changes made since, and
+                    # changes made during the reload are replayed from the stream
+                    await self.refresh(collection)
+                    async for change in stream:
+                        self.apply_change(change)
+                # A drop or rename invalidates the stream, which then ends
+                logger.info("Career change stream ended, reloading and watching again")
+            except PyMongoError as e:
+                if not opened and isinstance(e, OperationFailure):
+                    # Standalone servers have no change streams; fall back to polling
+                    logger.info("Career change stream unavailable (%s), reloading every %ss", e, REFRESH_SECONDS)
+                    break
+                # Includes an unreachable server: keep trying until a stream opens
+                logger.warning("Career change stream failed (%s), reopening", e)
+                await asyncio.sleep(RETRY_SECONDS)
+        while True:
+            await asyncio.sleep(REFRESH_SECONDS)
+            try:
+                await self.refresh(collection)
+            except PyMongoError as e:
+                logger.warning("Career catalog reload failed: %s", e)
+
+
+catalog = CareerCatalog()
@@ -1,55 +1,442 @@
 """
 Database Helper Functions
 
-MongoDB helper functions ready to use in your backend code.
-Import and use these functions in your API endpoints for database operations.
+Async MongoDB helper functions (Motor) ready to use in your backend code.
+Import and await these functions in your API endpoints for database operations.
 """
 
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel, InsertOne, UpdateOne, monitoring
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
 from datetime import datetime, timezone
+import asyncio
+import itertools
+import logging
 import os
+import threading
+import time
 from dotenv import load_dotenv
-from typing import Union
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Union
 from pydantic import BaseModel
 
+from metrics import command_metrics
+
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
 _client = None
 db = None
 
 database_url = os.getenv("DATABASE_URL")
 database_name = os.getenv("DATABASE_NAME")
 
+# Pool settings, per worker process
+max_pool_size = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+min_pool_size = int(os.getenv("MONGO_MIN_POOL_SIZE", "10"))
+max_idle_time_ms = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+wait_queue_timeout_ms = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+server_selection_timeout_ms = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+# Caps concurrent connection handshakes so a cold pool does not storm the server
+max_connecting = int(os.getenv("MONGO_MAX_CONNECTING", "2"))
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool counters fed by pymongo pool events
+
+    Checkout events fire on the driver thread doing the checkout, so the
+    wait start is kept thread-local; connection creation is matched to
+    readiness by connection id.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._created_at = {}
+        self.checked_out = 0
+        self.open = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.connections_created = 0
+        self.create_total = 0.0
+        self.create_max = 0.0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "max_pool_size": max_pool_size,
+                "min_pool_size": min_pool_size,
+                "open": self.open,
+                "checked_out": self.checked_out,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "wait_ms_avg": 1000 * self.wait_total / self.checkouts if self.checkouts else 0.0,
+                "wait_ms_max": 1000 * self.wait_max,
+                "connections_created": self.connections_created,
+                "create_ms_avg": 1000 * self.create_total / self.connections_created if self.connections_created else 0.0,
+                "create_ms_max": 1000 * self.create_max,
+            }
+
+    def _waited(self):
+        start = getattr(self._local, "start", None)
+        self._local.start = None
+        return time.perf_counter() - start if start is not None else 0.0
+
+    def connection_check_out_started(self, event):
+        self._local.start = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        waited = self._waited()
+        with self._lock:
+            self.checked_out += 1
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def connection_check_out_failed(self, event):
+        self._waited()
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+            self._created_at[(event.address, event.connection_id)] = time.perf_counter()
+
+    def connection_ready(self, event):
+        with self._lock:
+            start = self._created_at.pop((event.address, event.connection_id), None)
+            if start is not None:
+                took = time.perf_counter() - start
+                self.connections_created += 1
+                self.create_total += took
+                self.create_max = max(self.create_max, took)
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open -= 1
+            self._created_at.pop((event.address, event.connection_id), None)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+pool_metrics = PoolMetrics()
+
+def create_client(url: str) -> AsyncIOMotorClient:
+    """Client with the configured pool settings and pool/command metrics attached"""
+    return AsyncIOMotorClient(
+        url,
+        maxPoolSize=max_pool_size,
+        minPoolSize=min_pool_size,
+        maxIdleTimeMS=max_idle_time_ms,
+        waitQueueTimeoutMS=wait_queue_timeout_ms,
+        serverSelectionTimeoutMS=server_selection_timeout_ms,
+        maxConnecting=max_connecting,
+        event_listeners=[pool_metrics, command_metrics],
+    )
+
 if database_url and database_name:
-    _client = MongoClient(database_url)
+    # Motor connects lazily, so creating the client at import opens nothing
+    _client = create_client(database_url)
     db = _client[database_name]
 
-# Helper functions for common database operations
-def create_document(collection_name: str, data: Union[BaseModel, dict]):
-    """Insert a single document with timestamp"""
+async def connect() -> bool:
+    """Warm up the pool at application startup; whether the server answered
+
+    Runs `min_pool_size` concurrent pings so that many connections are
+    established before the first request instead of during it. An
+    unreachable server is logged, not raised: the worker starts anyway and
+    requests reconnect once the server is back.
+    """
+    if db is None:
+        return False
+    try:
+        await asyncio.gather(*(db.command("ping") for _ in range(max(1, min_pool_size))))
+    except PyMongoError as e:
+        logger.warning("Database not reachable at startup: %s", e)
+        return False
+    return True
+
+def close():
+    """Close all pooled connections at application shutdown"""
+    if _client is not None:
+        _client.close()
+
+def pool_stats() -> dict:
+    return pool_metrics.snapshot()
+
+# Result of the last sync_indexes run, per collection
+index_report: Dict[str, dict] = {}
+
+def _index_spec(info: dict) -> tuple:
+    return (tuple((k, v) for k, v in info["key"]), bool(info.get("unique", False)))
+
+async def sync_indexes(registry: Dict[str, List[IndexModel]]) -> Dict[str, dict]:
+    """Create missing declared indexes and report drift
+
+    Indexes that exist under a declared name but with different keys or
+    options, and indexes present in the database but not declared, are
+    reported rather than changed: dropping or rebuilding them is left to
+    an operator.
+    """
+    _require_db()
+
+    for collection_name, models in registry.items():
+        report = {"created": [], "changed": [], "undeclared": [], "errors": []}
+        collection = db[collection_name]
+        existing = await collection.index_information()
+        missing = []
+        for model in models:
+            doc = model.document
+            name = doc["name"]
+            if name not in existing:
+                missing.append(model)
+            elif _index_spec(existing[name]) != _index_spec({"key": list(doc["key"].items()), "unique": doc.get("unique")}):
+                report["changed"].append(name)
+        declared = {m.document["name"] for m in models}
+        report["undeclared"] = sorted(n for n in existing if n != "_id_" and n not in declared)
+        for model in missing:
+            # One at a time so a failing build (e.g. duplicates under a new
+            # unique index) does not block the others
+            try:
+                await collection.create_indexes([model])
+                report["created"].append(model.document["name"])
+            except PyMongoError as e:
+                report["errors"].append(f"{model.document['name']}: {e}")
+        if report["changed"] or report["undeclared"] or report["errors"]:
+            logger.warning("Index drift on %s: %s", collection_name, report)
+        index_report[collection_name] = report
+    return index_report
+
+# Called with the collection name after every write made through the helpers
+write_listeners: List[Callable[[str], None]] = []
+
+def _notify(collection_name: str):
+    for listener in write_listeners:
+        listener(collection_name)
+
+def _require_db():
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
 
+def _to_dict(data: Union[BaseModel, dict]) -> dict:
     # Convert Pydantic model to dict if needed
     if isinstance(data, BaseModel):
-        data_dict = data.model_dump()
-    else:
-        data_dict = data.copy()
+        return data.model_dump()
+    return data.copy()
 
-    data_dict['created_at'] = datetime.now(timezone.utc)
-    data_dict['updated_at'] = datetime.now(timezone.utc)
+# Helper functions for common database operations
+async def create_document(collection_name: str, data: Union[BaseModel, dict]):
+    """Insert a single document with timestamp"""
+    _require_db()
 
-    result = db[collection_name].insert_one(data_dict)
+    data_dict = _to_dict(data)
+    now = datetime.now(timezone.utc)
+    data_dict['created_at'] = now
+    data_dict['updated_at'] = now
+
+    result = await db[collection_name].insert_one(data_dict)
+    _notify(collection_name)
     return str(result.inserted_id)
 
-def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
-    """Get documents from collection"""
+async def insert_if_absent(collection_name: str, key: dict, data: Union[BaseModel, dict]) -> Optional[str]:
+    """Atomically insert a document unless one matching `key` exists
+
+    A single upsert with $setOnInsert, so it is one round-trip and safe
+    against concurrent callers when `key` is backed by a unique index.
+    Returns the new id, or None if the document already existed.
+    """
+    _require_db()
+
+    data_dict = _to_dict(data)
+    now = datetime.now(timezone.utc)
+    data_dict['created_at'] = now
+    data_dict['updated_at'] = now
+    on_insert = {k: v for k, v in data_dict.items() if k not in key}
+    try:
+        result = await db[collection_name].update_one(key, {"$setOnInsert": on_insert}, upsert=True)
+    except DuplicateKeyError:
+        # Lost a race with a concurrent insert of the same key
+        return None
+    if result.upserted_id is None:
+        return None
+    _notify(collection_name)
+    return str(result.upserted_id)
+
+async def insert_many_ignoring_duplicates(collection_name: str, docs: List[dict]):
+    """Unordered insert for at-least-once writers whose documents carry their `_id`
+
+    Duplicate keys are documents an earlier (partial) attempt already
+    stored and are ignored; documents failing otherwise are logged and
+    dropped. Raises PyMongoError when the write as a whole fails.
+    """
     if db is None:
-        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
-    
+        raise PyMongoError("Database not available")
+    try:
+        await db[collection_name].insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        errors = [err for err in e.details.get("writeErrors", []) if err.get("code") != DUPLICATE_KEY]
+        if errors:
+            logger.error("Dropped %d %s documents: %s", len(errors), collection_name, errors[0].get("errmsg"))
+
+async def insert_many_if_absent(collection_name: str, items: Sequence[Union[BaseModel, dict]],
+                                key: Sequence[str]) -> List[Optional[str]]:
+    """insert_if_absent for many documents in one unordered bulk write
+
+    Returns the new id or None for each item, in input order.
+    """
+    _require_db()
+
+    if not items:
+        return []
+    now = datetime.now(timezone.utc)
+    requests = []
+    for data in items:
+        data_dict = _to_dict(data)
+        data_dict['created_at'] = now
+        data_dict['updated_at'] = now
+        match = {k: data_dict[k] for k in key}
+        on_insert = {k: v for k, v in data_dict.items() if k not in match}
+        requests.append(UpdateOne(match, {"$setOnInsert": on_insert}, upsert=True))
+    try:
+        result = await db[collection_name].bulk_write(requests, ordered=False)
+        upserted = result.upserted_ids
+    except BulkWriteError as e:
+        # Duplicate keys from concurrent saves count as "already there"
+        if any(err.get("code") != DUPLICATE_KEY for err in e.details.get("writeErrors", [])):
+            raise
+        upserted = {u["index"]: u["_id"] for u in e.details.get("upserted", [])}
+    if upserted:
+        _notify(collection_name)
+    return [str(upserted[i]) if i in upserted else None for i in range(len(items))]
+
+async def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
+    """Get documents from collection"""
+    _require_db()
+
     cursor = db[collection_name].find(filter_dict or {})
     if limit:
         cursor = cursor.limit(limit)
-    
-    return list(cursor)
+
+    return await cursor.to_list(length=None)
+
+async def update_document(collection_name: str, filter_dict: dict, data: Union[BaseModel, dict]):
+    """Update the first matching document and refresh its timestamp"""
+    _require_db()
+
+    data_dict = _to_dict(data)
+    data_dict['updated_at'] = datetime.now(timezone.utc)
+
+    result = await db[collection_name].update_one(filter_dict, {"$set": data_dict})
+    _notify(collection_name)
+    return result.modified_count
+
+async def delete_document(collection_name: str, filter_dict: dict):
+    """Delete the first matching document"""
+    _require_db()
+
+    result = await db[collection_name].delete_one(filter_dict)
+    _notify(collection_name)
+    return result.deleted_count
+
+def _batches(items: Iterable, batch_size: int):
+    it = iter(items)
+    while True:
+        batch = list(itertools.islice(it, batch_size))
+        if not batch:
+            return
+        yield batch
+
+async def _bulk_write(collection_name: str, requests: list, ordered: bool, batch: int, started: float):
+    """Run one bulk_write and summarize it; unordered batches report errors instead of raising
+
+    `write_errors` holds the index within the batch and the message of each
+    request the server rejected.
+    """
+    stats = {"batch": batch, "count": len(requests), "errors": 0, "write_errors": []}
+    try:
+        result = await db[collection_name].bulk_write(requests, ordered=ordered)
+        details = result.bulk_api_result
+    except BulkWriteError as e:
+        if ordered:
+            raise
+        details = e.details
+        stats["write_errors"] = [{"index": err["index"], "errmsg": err.get("errmsg")}
+                                 for err in details.get("writeErrors", [])]
+        stats["errors"] = len(stats["write_errors"])
+    finally:
+        _notify(collection_name)
+    stats.update({
+        "inserted": details.get("nInserted", 0),
+        "upserted": details.get("nUpserted", 0),
+        "matched": details.get("nMatched", 0),
+        "modified": details.get("nModified", 0),
+        "seconds": time.perf_counter() - started,
+    })
+    return stats
+
+async def create_documents(collection_name: str, items: Iterable[Union[BaseModel, dict]],
+                           batch_size: int = 1000, ordered: bool = False) -> List[dict]:
+    """Insert many documents in batched bulk writes
+
+    `items` may be any iterable or generator of models or dicts; it is
+    consumed one batch at a time. Every document in a batch shares one
+    timestamp. Returns one stats dict per batch.
+    """
+    _require_db()
+
+    stats = []
+    for i, batch in enumerate(_batches(items, batch_size)):
+        started = time.perf_counter()
+        now = datetime.now(timezone.utc)
+        requests = []
+        for data in batch:
+            data_dict = _to_dict(data)
+            data_dict['created_at'] = now
+            data_dict['updated_at'] = now
+            requests.append(InsertOne(data_dict))
+        stats.append(await _bulk_write(collection_name, requests, ordered, i, started))
+    return stats
+
+async def upsert_documents(collection_name: str, items: Iterable[Union[BaseModel, dict]],
+                           key: Union[str, Sequence[str]], batch_size: int = 1000,
+                           ordered: bool = False) -> List[dict]:
+    """Insert or update many documents matched on `key` in batched bulk writes
+
+    `key` names the field (or fields) identifying a document. Existing
+    documents get their fields replaced via $set and keep `created_at`.
+    Returns one stats dict per batch.
+    """
+    _require_db()
+
+    keys = [key] if isinstance(key, str) else list(key)
+    stats = []
+    for i, batch in enumerate(_batches(items, batch_size)):
+        started = time.perf_counter()
+        now = datetime.now(timezone.utc)
+        requests = []
+        for data in batch:
+            data_dict = _to_dict(data)
+            data_dict.pop('created_at', None)
+            data_dict['updated_at'] = now
+            match = {k: data_dict[k] for k in keys}
+            requests.append(UpdateOne(match, {"$set": data_dict, "$setOnInsert": {"created_at": now}}, upsert=True))
+        stats.append(await _bulk_write(collection_name, requests, ordered, i, started))
+    return stats
@@ -0,0 +1,94 @@
+"""
+Fixture Data
+
+Reference data the app ships with. Applied to the database by the
+migrations in migrations.py; a changed fixture needs a new migration.
+"""
+
+from schemas import Career, Counselor, TestQuestion
+
+CAREERS = [
+    Career(
+        icon="Stethoscope",
+        name_en="Nurse",
+        name_te="నర్స్",
+        short_desc_en="Care for patients in hospitals and clinics.",
+        short_desc_te="ఆస్పత్రుల్లో రోగుల సంరక్షణ.",
+        salary_min=15000,
+        salary_max=40000,
+        education="Diploma/B.Sc Nursing",
+        job_type="Government",
+        field="Healthcare",
+        skills=["Compassion", "Communication", "Basic Medical"],
+        tags=["helping", "people"],
+        growth_path_en=["Nursing Student", "Staff Nurse", "Head Nurse"],
+        growth_path_te=["విద్యార్థి నర్స్", "స్టాఫ్ నర్స్", "హెడ్ నర్స్"],
+    ),
+    Career(
+        icon="Wrench",
+        name_en="Electrician",
+        name_te="ఎలక్ట్రిషియన్",
+        short_desc_en="Install and repair electrical systems.",
+        short_desc_te="విద్యుత్ వ్యవస్థల ఏర్పాటు మరియు మరమ్మత్తులు.",
+        salary_min=12000,
+        salary_max=35000,
+        education="ITI Electrician / Apprenticeship",
+        job_type="Private",
+        field="Trades",
+        skills=["Problem Solving", "Safety", "Tools"],
+        tags=["fixing", "hands-on"],
+        growth_path_en=["Apprentice", "Technician", "Contractor"],
+        growth_path_te=["శిక్షణార్థి", "టెక్నీషియన్", "కాంట్రాక్టర్"],
+    ),
+    Career(
+        icon="PenTool",
+        name_en="Teacher",
+        name_te="ఉపాధ్యాయుడు",
+        short_desc_en="Teach students and guide learning.",
+        short_desc_te="విద్యార్థులకు బోధించడం మరియు మార్గనిర్దేశం.",
+        salary_min=18000,
+        salary_max=50000,
+        education="B.Ed / D.Ed",
+        job_type="Government",
+        field="Education",
+        skills=["Communication", "Patience"],
+        tags=["teaching", "helping"],
+        growth_path_en=["Assistant Teacher", "Teacher", "Headmaster"],
+        growth_path_te=["సహాయ ఉపాధ్యాయుడు", "ఉపాధ్యాయుడు", "హెడ్‌మాస్టర్"],
+    ),
+]
+
+TEST_QUESTIONS = [
+    TestQuestion(step=1, question_en="Which activity do you enjoy most?", question_te="మీకు ఎక్కువగా ఇష్టమయ్యే చర్య ఏది?", options=[
+        {"key": "fix", "label_en": "Fixing things", "label_te": "వస్తువులు సరిచేయడం", "icon": "Wrench"},
+        {"key": "help", "label_en": "Helping people", "label_te": "జనాలకు సహాయం చేయడం", "icon": "Heart"},
+        {"key": "teach", "label_en": "Teaching others", "label_te": "ఇతరులకు బోధించడం", "icon": "BookOpen"},
+        {"key": "create", "label_en": "Drawing/creative", "label_te": "డ్రాయింగ్/సృజనాత్మక", "icon": "PenTool"},
+    ]),
+    TestQuestion(step=2, question_en="Where do you prefer to work?", question_te="మీకు ఏ పనిస్థలం ఇష్టం?", options=[
+        {"key": "out", "label_en": "Outdoors", "label_te": "బయట", "icon": "Trees"},
+        {"key": "in", "label_en": "Indoors", "label_te": "లోపల", "icon": "Home"},
+        {"key": "both", "label_en": "Both", "label_te": "రెండూ", "icon": "Sun"},
+    ]),
+    TestQuestion(step=3, question_en="What matters more?", question_te="మీకు ఎక్కువ ముఖ్యమైనది?", options=[
+        {"key": "pay", "label_en": "High salary", "label_te": "ఎక్కువ జీతం", "icon": "IndianRupee"},
+        {"key": "secure", "label_en": "Job security", "label_te": "ఉద్యోగ భద్రత", "icon": "Shield"},
+        {"key": "impact", "label_en": "Helping society", "label_te": "సమాజానికి సహాయం", "icon": "HandHeart"},
+    ]),
+    TestQuestion(step=4, question_en="Your strength?", question_te="మీ బలం?", options=[
+        {"key": "hands", "label_en": "Hands-on work", "label_te": "చేతులతో పని", "icon": "Hammer"},
+        {"key": "people", "label_en": "People skills", "label_te": "మనుషులతో సామర్థ్యం", "icon": "Users"},
+        {"key": "logic", "label_en": "Logic/Math", "label_te": "తార్కికం/గణితం", "icon": "FunctionSquare"},
+        {"key": "art", "label_en": "Art/Design", "label_te": "కళ/డిజైన్", "icon": "Palette"},
+    ]),
+    TestQuestion(step=5, question_en="Preferred employer?", question_te="ఇష్టమైన ఉద్యోగం?", options=[
+        {"key": "govt", "label_en": "Government", "label_te": "ప్రభుత్వ", "icon": "Building2"},
+        {"key": "private", "label_en": "Private", "label_te": "ప్రైవేట్", "icon": "Briefcase"},
+        {"key": "self", "label_en": "Self-employed", "label_te": "స్వయం ఉపాధి", "icon": "Store"},
+    ]),
+]
+
+COUNSELORS = [
+    Counselor(name="Anitha R.", phone="90000 11111", district="Anantapur"),
+    Counselor(name="Srinivas K.", phone="90000 22222", district="Kurnool"),
+]
@@ -0,0 +1,190 @@
+"""
+Career Catalog Importer
+
+Streams a CSV or JSONL file of careers into the `career` collection:
+
+    python import_careers.py careers.csv
+    python import_careers.py careers.jsonl --resume
+
+Rows are read lazily, validated against the `Career` schema in a process
+pool and written in bulk batches, so memory stays flat regardless of file
+size. After every committed batch the row offset is saved to
+`<file>.checkpoint`; `--resume` continues from there after a crash. Rows
+that cannot be parsed or fail validation are appended to
+`<file>.rejected.jsonl`, and so are rows the server refuses to write
+(duplicate keys, document validation). Upserts match on `--key`, which
+gets an index first if none starts with it.
+
+CSV list columns (skills, tags, growth paths) may hold a JSON array or
+`|`-separated values.
+"""
+
+import argparse
+import asyncio
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Tuple, Union
+
+from pydantic import ValidationError
+
+from schemas import Career
+
+LIST_FIELDS = ("skills", "tags", "growth_path_en", "growth_path_te")
+
+
+def _split_list(value: str) -> List[str]:
+    value = (value or "").strip()
+    if not value:
+        return []
+    if value.startswith("["):
+        return json.loads(value)
+    return [v.strip() for v in value.split("|") if v.strip()]
+
+
+def read_records(path: str, fmt: str) -> Iterator[Union[dict, str]]:
+    """Yield unparsed career records: CSV rows as read, JSONL lines as text"""
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield line
+
+
+def parse_record(raw: Union[dict, str]) -> dict:
+    """A career record from a CSV row or JSONL line; ValueError if malformed"""
+    if isinstance(raw, str):
+        return json.loads(raw)
+    row = dict(raw)
+    for key in LIST_FIELDS:
+        if key in row:
+            row[key] = _split_list(row[key])
+    return row
+
+
+def validate_chunk(args: Tuple[int, List[Union[dict, str]]]) -> Tuple[List[Tuple[int, dict]], List[dict]]:
+    """Parse and validate raw records into (offset, career) pairs (runs in a worker process)"""
+    offset, records = args
+    docs, rejected = [], []
+    for i, raw in enumerate(records):
+        try:
+            docs.append((offset + i, Career(**parse_record(raw)).model_dump()))
+        except (ValidationError, ValueError, TypeError) as e:
+            rejected.append({"offset": offset + i, "record": raw, "error": str(e)})
+    return docs, rejected
+
+
+async def ensure_key_index(collection, key: str):
+    """Index the upsert key so each upsert is not a collection scan"""
+    indexes = await collection.index_information()
+    if not any(next(iter(spec["key"]))[0] == key for spec in indexes.values()):
+        print(f"Creating an index on {key}", file=sys.stderr)
+        await collection.create_index(key, name=key)
+
+
+def read_checkpoint(path: str) -> int:
+    try:
+        with open(path + ".checkpoint") as f:
+            return json.load(f)["offset"]
+    except FileNotFoundError:
+        return 0
+
+
+def write_checkpoint(path: str, offset: int):
+    tmp = path + ".checkpoint.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"offset": offset}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path + ".checkpoint")
+
+
+async def run(path: str, fmt: str, batch_size: int, workers: int, key: str, insert: bool, resume: bool):
+    from database import db, create_documents, upsert_documents
+
+    if db is None:
+        raise SystemExit("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    if not insert:
+        await ensure_key_index(db["career"], key)
+    offset = read_checkpoint(path) if resume else 0
+    records = itertools.islice(read_records(path, fmt), offset, None)
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    written = rejected_total = errors_total = 0
+
+    async def commit(item):
+        nonlocal offset, written, rejected_total, errors_total
+        count, future = item
+        valid, rejected = await future
+        if valid:
+            offsets, docs = zip(*valid)
+            if insert:
+                stats = await create_documents("career", docs, batch_size=len(docs))
+            else:
+                stats = await upsert_documents("career", docs, key=key, batch_size=len(docs))
+            written += sum(s["inserted"] + s["upserted"] + s["matched"] for s in stats)
+            # Rows the server refused (duplicate keys, document validation)
+            for s in stats:
+                for err in s["write_errors"]:
+                    i = s["batch"] * len(docs) + err["index"]
+                    rejected.append({"offset": offsets[i], "record": docs[i], "error": err["errmsg"]})
+                    errors_total += 1
+        if rejected:
+            rejected_total += len(rejected)
+            with open(path + ".rejected.jsonl", "a", encoding="utf-8") as f:
+                for r in rejected:
+                    f.write(json.dumps(r, ensure_ascii=False, default=str) + "\n")
+        offset += count
+        write_checkpoint(path, offset)
+        elapsed = time.perf_counter() - started
+        print(f"offset={offset} written={written} rejected={rejected_total} write_errors={errors_total} "
+              f"rate={written / elapsed:.0f} rows/s", file=sys.stderr)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Keep a bounded number of chunks in flight; committing them in
+        # submission order keeps the checkpoint offset exact.
+        pending = deque()
+        chunk_offset = offset
+        while True:
+            chunk = list(itertools.islice(records, batch_size))
+            if not chunk:
+                break
+            future = loop.run_in_executor(pool, validate_chunk, (chunk_offset, chunk))
+            pending.append((len(chunk), future))
+            chunk_offset += len(chunk)
+            if len(pending) >= workers * 2:
+                await commit(pending.popleft())
+        while pending:
+            await commit(pending.popleft())
+
+    elapsed = time.perf_counter() - started
+    print(f"Imported {written} careers in {elapsed:.1f}s ({written / max(elapsed, 1e-9):.0f} rows/s), "
+          f"{rejected_total} rejected ({errors_total} refused by the server)", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import careers from a CSV or JSONL file")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--key", default="name_en", help="field used to upsert existing careers")
+    parser.add_argument("--insert", action="store_true", help="plain inserts instead of upserts (fresh catalog)")
+    parser.add_argument("--resume", action="store_true", help="continue from the saved checkpoint")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "jsonl")
+    asyncio.run(run(args.path, fmt, args.batch_size, args.workers, args.key, args.insert, args.resume))
+
+
+if __name__ == "__main__":
+    main()
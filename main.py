@@ -1,12 +1,39 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import logging
 import os
+import time
+from datetime import datetime, timezone
 from typing import List, Optional
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from bson.objectid import ObjectId
+from pymongo.errors import PyMongoError
 
-from database import db, create_document, get_documents
-from schemas import Career, SavedCareer, TestQuestion, TestSubmission, TestResult, Counselor, ContactMessage
+import database
+from database import (
+    db, insert_if_absent, insert_many_if_absent,
+    connect, close, pool_stats, sync_indexes, index_report,
+)
+from cache import make_key, response_cache
+from metrics import MetricsMiddleware, render as render_metrics, serializing
+import profiler
+from catalog import catalog
+from fixtures import TEST_QUESTIONS
+from questions import QuestionSet, question_store
+from spool import contact_spool
+from writebehind import test_results
+from recommend import recommender
+from rules import RULES_FILE, rule_store
+from serialize import JSONBytes, dumps, join_array
+from schemas import CareerBatch, SavedCareer, SavedCareerBatch, TestQuestion, TestSubmission, TestResult, Counselor, ContactMessage, INDEXES
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="CareerPath API", version="1.0")
 
@@ -16,10 +43,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Pagination cursors and cache validators travel in headers the front end must read
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
+app.add_middleware(MetricsMiddleware)
 
 @app.get("/")
-def root():
+async def root():
     return {"message": "CareerPath API running"}
 
 # Utility
@@ -41,225 +71,409 @@ def to_str_id(doc):
     doc["id"] = str(doc.pop("_id"))
     return doc
 
-# Seed minimal data if empty
+# Each career's card is validated and encoded once, then reused by every list response
+def encode_card(doc: dict) -> bytes:
+    with serializing():
+        return dumps(CareerCard(**doc).model_dump())
+
+catalog.card_encoder = encode_card
+
+# Writes through the helpers and catalog changes drop the matching cached responses
+database.write_listeners.append(response_cache.invalidate)
+catalog.listeners.append(lambda: response_cache.invalidate("career"))
+
+@app.on_event("startup")
+async def open_database():
+    # When the server is down the startup loads below are skipped rather than
+    # each waiting out server selection; the watchers load once it is back
+    app.state.database_up = await connect()
+
+# Test results are written behind the response; contact messages go through a local spool
+@app.on_event("startup")
+async def start_writers():
+    test_results.start()
+    contact_spool.open()
+
+@app.on_event("shutdown")
+async def flush_writers():
+    # Registered before close_database so queued documents are written first
+    await test_results.stop()
+    await contact_spool.close()
+
+@app.on_event("shutdown")
+async def close_database():
+    close()
+
 @app.on_event("startup")
-def seed_data():
+async def build_indexes():
+    # Runs in the background so index builds never hold up startup
+    if db is not None:
+        app.state.index_sync = asyncio.create_task(sync_startup_indexes())
+
+async def sync_startup_indexes():
+    try:
+        await sync_indexes(INDEXES)
+    except PyMongoError as e:
+        logger.warning("Index sync failed at startup: %s", e)
+
+@app.on_event("startup")
+async def load_catalog():
     if db is None:
         return
-    if db["career"].count_documents({}) == 0:
-        sample = [
-            Career(
-                icon="Stethoscope",
-                name_en="Nurse",
-                name_te="నర్స్",
-                short_desc_en="Care for patients in hospitals and clinics.",
-                short_desc_te="ఆస్పత్రుల్లో రోగుల సంరక్షణ.",
-                salary_min=15000,
-                salary_max=40000,
-                education="Diploma/B.Sc Nursing",
-                job_type="Government",
-                field="Healthcare",
-                skills=["Compassion", "Communication", "Basic Medical"],
-                tags=["helping", "people"],
-                growth_path_en=["Nursing Student", "Staff Nurse", "Head Nurse"],
-                growth_path_te=["విద్యార్థి నర్స్", "స్టాఫ్ నర్స్", "హెడ్ నర్స్"],
-            ).model_dump(),
-            Career(
-                icon="Wrench",
-                name_en="Electrician",
-                name_te="ఎలక్ట్రిషియన్",
-                short_desc_en="Install and repair electrical systems.",
-                short_desc_te="విద్యుత్ వ్యవస్థల ఏర్పాటు మరియు మరమ్మత్తులు.",
-                salary_min=12000,
-                salary_max=35000,
-                education="ITI Electrician / Apprenticeship",
-                job_type="Private",
-                field="Trades",
-                skills=["Problem Solving", "Safety", "Tools"],
-                tags=["fixing", "hands-on"],
-                growth_path_en=["Apprentice", "Technician", "Contractor"],
-                growth_path_te=["శిక్షణార్థి", "టెక్నీషియన్", "కాంట్రాక్టర్"],
-            ).model_dump(),
-            Career(
-                icon="PenTool",
-                name_en="Teacher",
-                name_te="ఉపాధ్యాయుడు",
-                short_desc_en="Teach students and guide learning.",
-                short_desc_te="విద్యార్థులకు బోధించడం మరియు మార్గనిర్దేశం.",
-                salary_min=18000,
-                salary_max=50000,
-                education="B.Ed / D.Ed",
-                job_type="Government",
-                field="Education",
-                skills=["Communication", "Patience"],
-                tags=["teaching", "helping"],
-                growth_path_en=["Assistant Teacher", "Teacher", "Headmaster"],
-                growth_path_te=["సహాయ ఉపాధ్యాయుడు", "ఉపాధ్యాయుడు", "హెడ్‌మాస్టర్"],
-            ).model_dump(),
-        ]
-        db["career"].insert_many(sample)
+    # Under server.py the catalog was already loaded before the fork; either
+    # way the watcher reloads it in the background once its stream is open
+    if catalog.version == 0 and app.state.database_up:
+        try:
+            await catalog.refresh(db["career"])
+        except PyMongoError as e:
+            logger.warning("Career catalog not loaded at startup (%s); the watcher keeps trying", e)
+    catalog.watch(db["career"])
+
+@app.on_event("shutdown")
+async def stop_catalog():
+    catalog.stop()
+
+@app.on_event("startup")
+async def load_rules():
+    try:
+        # A rules file loads without the database; the collection waits for the watcher
+        if app.state.database_up or RULES_FILE:
+            await rule_store.refresh(db)
+    except PyMongoError as e:
+        logger.warning("Answer rules not loaded at startup (%s); using version %d until a reload works",
+                       e, rule_store.version)
+    rule_store.watch(db)
+
+@app.on_event("shutdown")
+async def stop_rules():
+    rule_store.stop()
+
+@app.on_event("startup")
+async def load_questions():
+    if db is None:
+        return
+    try:
+        if app.state.database_up:
+            await question_store.refresh(db)
+    except PyMongoError as e:
+        logger.warning("Question set not loaded at startup (%s); the poller keeps trying", e)
+    question_store.watch(db)
+
+@app.on_event("shutdown")
+async def stop_questions():
+    question_store.stop()
+
+def encode_cursor(career_id: str) -> str:
+    return base64.urlsafe_b64encode(career_id.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        career_id = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ObjectId(career_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return career_id
+
+CARD_FIELDS = set(CareerCard.model_fields)
 
 # Public endpoints
 @app.get("/api/careers", response_model=List[CareerCard])
-def list_careers(q: Optional[str] = None, field: Optional[str] = None, edu: Optional[str] = None):
+async def list_careers(
+    q: Optional[str] = None,
+    field: Optional[str] = None,
+    edu: Optional[str] = None,
+    limit: int = Query(60, ge=1, le=200),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated CareerCard fields to return"),
+):
+    """Careers in `_id` order, one page at a time
+
+    When more results exist the `X-Next-Cursor` header carries the cursor
+    for the next page.
+    """
     if db is None:
         return []
-    query = {}
-    if q:
-        query["$or"] = [
-            {"name_en": {"$regex": q, "$options": "i"}},
-            {"name_te": {"$regex": q, "$options": "i"}},
-            {"field": {"$regex": q, "$options": "i"}},
-            {"tags": {"$in": [q]}}
-        ]
-    if field:
-        query["field"] = field
-    if edu:
-        query["education"] = {"$regex": edu, "$options": "i"}
-
-    docs = list(db["career"].find(query).limit(60))
-    return [CareerCard(**to_str_id(d)) for d in docs]
+    after = decode_cursor(cursor) if cursor else None
+    only = None
+    if fields:
+        only = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = set(only) - CARD_FIELDS
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        only = ["id"] + [f for f in CareerCard.model_fields if f in only and f != "id"]
+
+    async def load():
+        docs = catalog.search(q=q, field=field, edu=edu, limit=limit + 1, after=after)
+        page = docs[:limit]
+        with serializing():
+            if only is None:
+                body = join_array(catalog.card_json(d) for d in page)
+            else:
+                body = dumps([{f: card[f] for f in only} for card in (CareerCard(**d).model_dump() for d in page)])
+        next_cursor = encode_cursor(page[-1]["id"]) if len(docs) > limit else ""
+        # Cached as "<next cursor>\n<body>" so shared backends can hold it as bytes
+        return next_cursor.encode() + b"\n" + body
+
+    key = make_key(q=q.lower() if q else None, field=field, edu=edu.lower() if edu else None,
+                   limit=limit, cursor=cursor, fields=",".join(only) if only else None)
+    next_cursor, body = (await response_cache.get_or_load("career", "list?" + key, load)).split(b"\n", 1)
+    headers = {"X-Next-Cursor": next_cursor.decode()} if next_cursor else None
+    return JSONBytes(body, headers=headers)
+
+def career_detail_json(doc: dict) -> bytes:
+    with serializing():
+        return dumps(jsonable_encoder(to_str_id(doc)))
+
+@app.post("/api/careers:batch")
+async def career_batch(batch: CareerBatch):
+    """Full career documents for many ids in one request
+
+    Streams `{"careers": [...], "missing": [...]}` with careers in request
+    order. Cached details are used as-is; the rest come from one `$in`
+    query and are emitted as soon as their turn in the order comes up.
+    """
+    if db is None:
+        raise HTTPException(status_code=500, detail="Database not available")
+    ids = batch.ids
+    ready = {}
+    for cid in dict.fromkeys(ids):
+        body = await response_cache.peek("career", "detail?" + cid)
+        if body is not None:
+            ready[cid] = body
+    to_fetch = [ObjectId(cid) for cid in dict.fromkeys(ids) if cid not in ready and ObjectId.is_valid(cid)]
+
+    async def stream():
+        yield b'{"careers":['
+        position = 0
+        emitted = 0
+
+        def flush():
+            nonlocal position, emitted
+            chunks = []
+            while position < len(ids) and ids[position] in ready:
+                body = ready[ids[position]]
+                if body is not None:
+                    chunks.append(b"," + body if emitted else body)
+                    emitted += 1
+                position += 1
+            return b"".join(chunks)
+
+        chunk = flush()
+        if chunk:
+            yield chunk
+        if to_fetch:
+            async for doc in db["career"].find({"_id": {"$in": to_fetch}}):
+                cid = str(doc["_id"])
+                ready[cid] = career_detail_json(doc)
+                await response_cache.put("career", "detail?" + cid, ready[cid])
+                chunk = flush()
+                if chunk:
+                    yield chunk
+        missing = [cid for cid in dict.fromkeys(ids) if cid not in ready]
+        for cid in missing:
+            ready[cid] = None
+        yield flush() + b'],"missing":' + dumps(missing) + b"}"
+
+    return StreamingResponse(stream(), media_type="application/json")
 
 @app.get("/api/careers/{career_id}")
-def career_detail(career_id: str):
+async def career_detail(career_id: str):
     if db is None:
         raise HTTPException(status_code=500, detail="Database not available")
-    doc = db["career"].find_one({"_id": ObjectId(career_id)})
-    if not doc:
+
+    async def load():
+        doc = await db["career"].find_one({"_id": ObjectId(career_id)})
+        return career_detail_json(doc) if doc else None
+
+    body = await response_cache.get_or_load("career", "detail?" + career_id, load)
+    if not body:
         raise HTTPException(status_code=404, detail="Not found")
-    return to_str_id(doc)
+    return JSONBytes(body)
 
 @app.post("/api/save", status_code=201)
-def save_career(item: SavedCareer):
+async def save_career(item: SavedCareer):
     if db is None:
         raise HTTPException(status_code=500, detail="Database not available")
-    existing = db["savedcareer"].find_one({"user_id": item.user_id, "career_id": item.career_id})
-    if existing:
+    _id = await insert_if_absent("savedcareer", {"user_id": item.user_id, "career_id": item.career_id}, item)
+    if _id is None:
         return {"status": "exists"}
-    _id = create_document("savedcareer", item)
     return {"status": "ok", "id": _id}
 
+@app.post("/api/save/batch", status_code=201)
+async def save_careers(batch: SavedCareerBatch):
+    if db is None:
+        raise HTTPException(status_code=500, detail="Database not available")
+    career_ids = list(dict.fromkeys(batch.career_ids))
+    items = [SavedCareer(user_id=batch.user_id, career_id=cid) for cid in career_ids]
+    ids = await insert_many_if_absent("savedcareer", items, key=("user_id", "career_id"))
+    return {"results": [
+        {"career_id": cid, "status": "ok", "id": _id} if _id else {"career_id": cid, "status": "exists"}
+        for cid, _id in zip(career_ids, ids)
+    ]}
+
+async def career_cards(career_ids: List[str]) -> dict:
+    """CareerCard dicts by id, from the catalog with one `$in` query for any misses"""
+    cards = {}
+    missing = []
+    for cid in set(career_ids):
+        doc = catalog.get(cid)
+        if doc is not None:
+            cards[cid] = CareerCard(**doc).model_dump()
+        elif ObjectId.is_valid(cid):
+            missing.append(ObjectId(cid))
+    if missing:
+        projection = {name: 1 for name in CARD_FIELDS if name != "id"}
+        async for doc in db["career"].find({"_id": {"$in": missing}}, projection):
+            card = CareerCard(**to_str_id(doc)).model_dump()
+            cards[card["id"]] = card
+    return cards
+
 @app.get("/api/saved/{user_id}")
-def list_saved(user_id: str):
+async def list_saved(
+    user_id: str,
+    request: Request,
+    embed: bool = Query(False, description="Include each saved career's card under `career`"),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+):
+    """Saved careers of a user in save order
+
+    With `limit`, results are paged and `X-Next-Cursor` carries the cursor
+    for the next page. Responses carry an ETag and honour If-None-Match.
+    """
     if db is None:
         return []
-    docs = list(db["savedcareer"].find({"user_id": user_id}))
+    query = {"user_id": user_id}
+    if cursor:
+        query["_id"] = {"$gt": ObjectId(decode_cursor(cursor))}
+    find = db["savedcareer"].find(query).sort("_id", 1)
+    docs = await find.to_list(length=limit + 1 if limit else None)
+    headers = {}
+    if limit and len(docs) > limit:
+        docs = docs[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(str(docs[-1]["_id"]))
     for d in docs:
         d["id"] = str(d.pop("_id"))
-    return docs
+    if embed:
+        cards = await career_cards([d["career_id"] for d in docs])
+        for d in docs:
+            d["career"] = cards.get(d["career_id"])
+
+    with serializing():
+        body = dumps(jsonable_encoder(docs))
+    headers["ETag"] = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    if headers["ETag"] in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return JSONBytes(body, headers=headers)
 
 @app.delete("/api/saved/{user_id}/{saved_id}")
-def delete_saved(user_id: str, saved_id: str):
+async def delete_saved(user_id: str, saved_id: str):
     if db is None:
         raise HTTPException(status_code=500, detail="Database not available")
-    db["savedcareer"].delete_one({"_id": ObjectId(saved_id), "user_id": user_id})
+    await db["savedcareer"].delete_one({"_id": ObjectId(saved_id), "user_id": user_id})
     return {"status": "deleted"}
 
 # Test questions (5 steps minimal)
+# Served when there is no database or no question set loaded yet
+STATIC_QUESTIONS = QuestionSet("static", TEST_QUESTIONS[:1])
+
 @app.get("/api/test/questions", response_model=List[TestQuestion])
-def get_questions():
-    if db is None:
-        # Fallback static if no DB
-        return [
-            TestQuestion(step=1, question_en="Which activity do you enjoy most?", question_te="మీకు ఎక్కువగా ఇష్టమయ్యే చర్య ఏది?", options=[
-                {"key": "fix", "label_en": "Fixing things", "label_te": "వస్తువులు సరిచేయడం", "icon": "Wrench"},
-                {"key": "help", "label_en": "Helping people", "label_te": "జనాలకు సహాయం చేయడం", "icon": "Heart"},
-                {"key": "teach", "label_en": "Teaching others", "label_te": "ఇతరులకు బోధించడం", "icon": "BookOpen"},
-                {"key": "create", "label_en": "Drawing/creative", "label_te": "డ్రాయింగ్/సృజనాత్మక", "icon": "PenTool"},
-            ]),
-        ]
-    docs = list(db["testquestion"].find({}).sort("step", 1))
-    if not docs:
-        # seed 5 simple steps
-        seeds = [
-            TestQuestion(step=1, question_en="Which activity do you enjoy most?", question_te="మీకు ఎక్కువగా ఇష్టమయ్యే చర్య ఏది?", options=[
-                {"key": "fix", "label_en": "Fixing things", "label_te": "వస్తువులు సరిచేయడం", "icon": "Wrench"},
-                {"key": "help", "label_en": "Helping people", "label_te": "జనాలకు సహాయం చేయడం", "icon": "Heart"},
-                {"key": "teach", "label_en": "Teaching others", "label_te": "ఇతరులకు బోధించడం", "icon": "BookOpen"},
-                {"key": "create", "label_en": "Drawing/creative", "label_te": "డ్రాయింగ్/సృజనాత్మక", "icon": "PenTool"},
-            ]),
-            TestQuestion(step=2, question_en="Where do you prefer to work?", question_te="మీకు ఏ పనిస్థలం ఇష్టం?", options=[
-                {"key": "out", "label_en": "Outdoors", "label_te": "బయట", "icon": "Trees"},
-                {"key": "in", "label_en": "Indoors", "label_te": "లోపల", "icon": "Home"},
-                {"key": "both", "label_en": "Both", "label_te": "రెండూ", "icon": "Sun"},
-            ]),
-            TestQuestion(step=3, question_en="What matters more?", question_te="మీకు ఎక్కువ ముఖ్యమైనది?", options=[
-                {"key": "pay", "label_en": "High salary", "label_te": "ఎక్కువ జీతం", "icon": "IndianRupee"},
-                {"key": "secure", "label_en": "Job security", "label_te": "ఉద్యోగ భద్రత", "icon": "Shield"},
-                {"key": "impact", "label_en": "Helping society", "label_te": "సమాజానికి సహాయం", "icon": "HandHeart"},
-            ]),
-            TestQuestion(step=4, question_en="Your strength?", question_te="మీ బలం?", options=[
-                {"key": "hands", "label_en": "Hands-on work", "label_te": "చేతులతో పని", "icon": "Hammer"},
-                {"key": "people", "label_en": "People skills", "label_te": "మనుషులతో సామర్థ్యం", "icon": "Users"},
-                {"key": "logic", "label_en": "Logic/Math", "label_te": "తార్కికం/గణితం", "icon": "FunctionSquare"},
-                {"key": "art", "label_en": "Art/Design", "label_te": "కళ/డిజైన్", "icon": "Palette"},
-            ]),
-            TestQuestion(step=5, question_en="Preferred employer?", question_te="ఇష్టమైన ఉద్యోగం?", options=[
-                {"key": "govt", "label_en": "Government", "label_te": "ప్రభుత్వ", "icon": "Building2"},
-                {"key": "private", "label_en": "Private", "label_te": "ప్రైవేట్", "icon": "Briefcase"},
-                {"key": "self", "label_en": "Self-employed", "label_te": "స్వయం ఉపాధి", "icon": "Store"},
-            ]),
-        ]
-        db["testquestion"].insert_many([s.model_dump() for s in seeds])
-        docs = list(db["testquestion"].find({}).sort("step", 1))
-    for d in docs:
-        d.pop("_id", None)
-    return docs
+async def get_questions(request: Request):
+    """The current question set; honours If-None-Match with 304"""
+    questions = question_store.current if db is not None else None
+    if questions is None:
+        questions = STATIC_QUESTIONS
+    if questions.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=questions.headers)
+    return JSONBytes(questions.body, headers=questions.headers)
 
 @app.post("/api/test/submit", response_model=TestResult)
-def submit_test(payload: TestSubmission):
-    # Simple rule mapping for demo: map answers to tags/fields
-    tag_map = {
-        "fix": ["hands-on", "Trades"],
-        "help": ["helping", "Healthcare"],
-        "teach": ["teaching", "Education"],
-        "create": ["creative", "Design"],
-        "logic": ["logic", "Engineering"],
-        "govt": ["Government"],
-        "private": ["Private"],
-        "self": ["Self-employed"],
-    }
-    filters = []
-    for a in payload.answers:
-        if a in tag_map:
-            val = tag_map[a]
-            if len(val) == 1:
-                filters.append({"job_type": val[0]})
-            else:
-                filters.append({"$or": [{"tags": {"$in": [val[0]]}}, {"field": val[1]}]})
-    query = {"$and": filters} if filters else {}
-
-    docs = list(db["career"].find(query).limit(6)) if db else []
-    ids = [str(d.get("_id")) for d in docs]
-    if db:
-        create_document("testresult", {"user_id": payload.user_id or "guest", "answers": payload.answers, "recommended_ids": ids})
+async def submit_test(payload: TestSubmission):
+    ids = recommender.recommend(payload.answers) if db is not None else []
+    if db is not None:
+        await test_results.put({"user_id": payload.user_id or "guest", "answers": payload.answers, "recommended_ids": ids})
     return TestResult(user_id=payload.user_id, recommended_ids=ids)
 
 @app.get("/api/counselors", response_model=List[Counselor])
-def counselors():
+async def counselors():
     if db is None:
         return []
-    docs = list(db["counselor"].find({}).limit(100))
-    if not docs:
-        seeds = [
-            Counselor(name="Anitha R.", phone="90000 11111", district="Anantapur"),
-            Counselor(name="Srinivas K.", phone="90000 22222", district="Kurnool"),
-        ]
-        db["counselor"].insert_many([s.model_dump() for s in seeds])
-        docs = list(db["counselor"].find({}).limit(100))
-    for d in docs:
-        d.pop("_id", None)
-    return docs
+
+    async def load():
+        docs = await db["counselor"].find({}).to_list(length=100)
+        with serializing():
+            return dumps([Counselor(**d).model_dump() for d in docs])
+
+    return JSONBytes(await response_cache.get_or_load("counselor", "all", load))
 
 @app.post("/api/contact")
-def contact(msg: ContactMessage):
-    if db:
-        create_document("contactmessage", msg)
+async def contact(msg: ContactMessage, request: Request):
+    """Commit the message to the local spool; it reaches the database in the background
+
+    Retries that repeat the `Idempotency-Key` header are stored once. The
+    key is scoped to the sender's email, so two senders choosing the same
+    key never drop each other's messages.
+    """
+    now = datetime.now(timezone.utc)
+    _id = ObjectId()
+    key = request.headers.get("idempotency-key")
+    doc = {"_id": _id, **msg.model_dump(), "created_at": now, "updated_at": now,
+           "dedupe_key": f"{msg.email.lower()}:{key}" if key else str(_id)}
+    await contact_spool.append(doc)
     return {"status": "received"}
 
+STARTED = time.monotonic()
+
+@app.get("/health")
+async def health():
+    """Liveness of this worker process"""
+    return {
+        "status": "ok",
+        "pid": os.getpid(),
+        "uptime_s": round(time.monotonic() - STARTED, 1),
+        "database": db is not None,
+        "catalog": {"careers": len(catalog), "version": catalog.version},
+    }
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics of this worker"""
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Admin endpoints are only served when ADMIN_TOKEN is set and sent as X-Admin-Token
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+def require_admin(request: Request):
+    token = request.headers.get("x-admin-token", "")
+    if not ADMIN_TOKEN or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+@app.get("/admin/profile", include_in_schema=False)
+async def profile(
+    request: Request,
+    seconds: float = Query(10, gt=0, le=120),
+    interval_ms: float = Query(5, ge=1, le=1000),
+    route: Optional[str] = Query(None, description="Only keep samples of this route path, e.g. /api/careers"),
+):
+    """Sample this worker's event loop for `seconds` and return collapsed stacks"""
+    require_admin(request)
+    only = profiler.endpoint_codes(app.routes, route)
+    if only is not None and not only:
+        raise HTTPException(status_code=404, detail="Unknown route")
+    running = profiler.begin(interval_ms / 1000, only)
+    if running is None:
+        raise HTTPException(status_code=409, detail="A profile is already running in this worker")
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        summary = profiler.end(running)
+    headers = {"X-Profile-Pid": str(os.getpid()), "X-Profile-Samples": str(summary["samples"]),
+               "X-Profile-Kept": str(summary["kept"])}
+    return Response(running.collapsed(), media_type="text/plain; charset=utf-8", headers=headers)
+
 # Health + DB test
 @app.get("/test")
-def test_database():
+async def test_database():
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -275,9 +489,14 @@ def test_database():
             response["database_name"] = db.name if hasattr(db, 'name') else "✅ Connected"
             response["connection_status"] = "Connected"
             try:
-                collections = db.list_collection_names()
+                collections = await db.list_collection_names()
                 response["collections"] = collections[:10]
                 response["database"] = "✅ Connected & Working"
+                response["pool"] = pool_stats()
+                response["cache"] = response_cache.stats()
+                response["indexes"] = index_report
+                response["write_behind"] = {"testresult": test_results.stats(), "contactmessage": contact_spool.stats()}
+                response["recommendations"] = recommender.stats()
             except Exception as e:
                 response["database"] = f"⚠️  Connected but Error: {str(e)[:50]}"
         else:
@@ -290,6 +509,5 @@ def test_database():
     return response
 
 if __name__ == "__main__":
-    import uvicorn
-    port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    import server
+    server.run()
@@ -0,0 +1,236 @@
+"""
+Request Metrics
+
+Latency histograms and counters in the Prometheus text format, served by
+GET /metrics:
+
+    http_requests_total                    by method, route and status
+    http_requests_in_flight                requests being handled right now
+    http_request_duration_seconds          by method and route
+    http_request_db_seconds                Mongo time spent by each request
+    http_request_serialize_seconds         encoding time spent by each request
+    mongodb_command_duration_seconds       by collection and command
+    mongodb_command_failures_total         by collection and command
+
+Routes are labelled with their path template (`/api/careers/{career_id}`),
+so ids never create new series. Mongo timings come from pymongo command
+monitoring. Motor runs commands in threads that inherit the request's
+context, which is how their time is charged to the request. Serialization
+is whatever the app wraps in `serializing()`.
+
+Every worker process keeps its own numbers.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from pymongo import monitoring
+
+# Seconds; fine-grained at the low end where cached responses live
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with one series per label tuple"""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...], buckets: Tuple[float, ...] = BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series: Dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels: str):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Per-bucket counts, then +Inf, sum
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        for labels, series in sorted(items):
+            base = _labels(self.labels, labels)
+            total = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                total += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{base}{"," if base else ""}le="{le}"}} {total}')
+            lines.append(f"{_series(self.name + '_sum', base)} {series[-1]}")
+            lines.append(f"{_series(self.name + '_count', base)} {total}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter (or gauge) with one value per label tuple"""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...], kind: str = "counter"):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.kind = kind
+        self._lock = threading.Lock()
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{_series(self.name, _labels(self.labels, labels))} {value}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _series(name: str, labels: str) -> str:
+    return f"{name}{{{labels}}}" if labels else name
+
+
+def _labels(names: Tuple[str, ...], values: tuple) -> str:
+    return ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values))
+
+
+requests_total = Counter("http_requests_total", "HTTP requests handled", ("method", "route", "status"))
+in_flight = Counter("http_requests_in_flight", "HTTP requests in progress", (), kind="gauge")
+request_duration = Histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+request_db = Histogram("http_request_db_seconds", "Mongo command time per HTTP request", ("method", "route"))
+request_serialize = Histogram("http_request_serialize_seconds", "Response encoding time per HTTP request",
+                              ("method", "route"))
+command_duration = Histogram("mongodb_command_duration_seconds", "Mongo command latency", ("collection", "command"))
+command_failures = Counter("mongodb_command_failures_total", "Failed Mongo commands", ("collection", "command"))
+
+METRICS = (requests_total, in_flight, request_duration, request_db, request_serialize,
+           command_duration, command_failures)
+
+
+def render() -> bytes:
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return ("\n".join(lines) + "\n").encode()
+
+
+class RequestStats:
+    """Time a single request spent in Mongo and in serialization"""
+
+    __slots__ = ("db", "serialize", "_depth")
+
+    def __init__(self):
+        self.db = 0.0
+        self.serialize = 0.0
+        self._depth = 0
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+@contextmanager
+def serializing():
+    """Charge the enclosed block to the current request's serialization time"""
+    stats = _current.get()
+    if stats is None or stats._depth:
+        # Outside a request, or nested in a block that is already timed
+        yield
+        return
+    stats._depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serialize += time.perf_counter() - started
+        stats._depth -= 1
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and in-flight counts"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_flight.inc(amount=-1)
+            _current.reset(token)
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            method = scope["method"]
+            requests_total.inc(method, path, str(status))
+            request_duration.observe(elapsed, method, path)
+            request_db.observe(stats.db, method, path)
+            request_serialize.observe(stats.serialize, method, path)
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Mongo command timings by collection and command name"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started: Dict[tuple, str] = {}
+
+    @staticmethod
+    def _collection(event) -> str:
+        command = event.command
+        if event.command_name == "getMore":
+            return command.get("collection", "")
+        target = command.get(event.command_name)
+        return target if isinstance(target, str) else ""
+
+    def started(self, event):
+        with self._lock:
+            self._started[(event.connection_id, event.request_id)] = self._collection(event)
+
+    def _finished(self, event) -> Tuple[str, float]:
+        with self._lock:
+            collection = self._started.pop((event.connection_id, event.request_id), "")
+        seconds = event.duration_micros / 1e6
+        stats = _current.get()
+        if stats is not None:
+            stats.db += seconds
+        return collection, seconds
+
+    def succeeded(self, event):
+        collection, seconds = self._finished(event)
+        command_duration.observe(seconds, collection, event.command_name)
+
+    def failed(self, event):
+        collection, seconds = self._finished(event)
+        command_duration.observe(seconds, collection, event.command_name)
+        command_failures.inc(collection, event.command_name)
+
+
+command_metrics = CommandMetrics()
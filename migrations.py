@@ -0,0 +1,156 @@
+"""
+Database Migrations
+
+Versioned, run-once changes to the database, including the fixture data
+the app ships with. Applied versions are recorded in the `migration`
+collection, so each one runs exactly once per database:
+
+    python migrations.py            apply every pending migration
+    python migrations.py --list     show applied and pending versions
+    python migrations.py --to 2     apply pending migrations up to version 2
+
+Run it once per deployment, before starting the server; the app itself
+never seeds or migrates. To change data that an earlier migration wrote,
+add a new migration instead of editing the old one.
+"""
+
+import argparse
+import asyncio
+import sys
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from fixtures import CAREERS, COUNSELORS, TEST_QUESTIONS
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[object], Awaitable[None]]
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, name: str):
+    def register(fn):
+        MIGRATIONS.append(Migration(version, name, fn))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return fn
+    return register
+
+
+# Fixture migrations only seed empty collections, like earlier releases
+# did at startup, so databases that already hold real or seeded data are
+# left as they are.
+async def seed_if_empty(db, name: str, docs: list, key: tuple):
+    if await db[name].find_one({}, {"_id": 1}) is not None:
+        print(f"{name} already has documents, not seeding it", file=sys.stderr)
+        return
+    now = datetime.now(timezone.utc)
+    requests = []
+    for doc in docs:
+        data = {**doc.model_dump(), "created_at": now, "updated_at": now}
+        match = {k: data.pop(k) for k in key}
+        requests.append(UpdateOne(match, {"$setOnInsert": data}, upsert=True))
+    await db[name].bulk_write(requests, ordered=False)
+
+
+@migration(1, "Seed the starter careers")
+async def seed_careers(db):
+    await seed_if_empty(db, "career", CAREERS, key=("name_en",))
+
+
+@migration(2, "Seed the five-step test questions")
+async def seed_test_questions(db):
+    await seed_if_empty(db, "testquestion", TEST_QUESTIONS, key=("step",))
+
+
+@migration(3, "Seed the counselor directory")
+async def seed_counselors(db):
+    await seed_if_empty(db, "counselor", COUNSELORS, key=("name", "phone"))
+
+
+@migration(4, "Publish the test question set")
+async def publish_test_questions(db):
+    from questions import publish
+
+    await publish(db)
+
+
+async def applied_versions(db) -> dict:
+    """Records of started or applied migrations by version"""
+    return {doc["_id"]: doc async for doc in db["migration"].find({})}
+
+
+async def apply(db, target: Optional[int] = None) -> List[int]:
+    """Apply pending migrations in version order; returns the versions applied
+
+    A migration is claimed by inserting its record before it runs, so two
+    concurrent runs never apply the same version. A failed migration's
+    record is removed again so the next run retries it.
+    """
+    done = await applied_versions(db)
+    applied = []
+    for m in MIGRATIONS:
+        if target is not None and m.version > target:
+            break
+        record = done.get(m.version)
+        if record is not None:
+            if record.get("state") != "applied":
+                raise RuntimeError(f"Migration {m.version} was started at {record.get('started_at')} and did not "
+                                   f"finish; check it and delete its `migration` record to retry")
+            continue
+        try:
+            await db["migration"].insert_one({"_id": m.version, "name": m.name, "state": "running",
+                                              "started_at": datetime.now(timezone.utc)})
+        except DuplicateKeyError:
+            raise RuntimeError(f"Migration {m.version} is being applied by another run")
+        try:
+            await m.apply(db)
+        except BaseException:
+            await db["migration"].delete_one({"_id": m.version})
+            raise
+        await db["migration"].update_one({"_id": m.version}, {"$set": {
+            "state": "applied", "applied_at": datetime.now(timezone.utc)}})
+        applied.append(m.version)
+        print(f"Applied {m.version}: {m.name}", file=sys.stderr)
+    return applied
+
+
+async def run(target: Optional[int], list_only: bool):
+    from database import db
+
+    if db is None:
+        raise SystemExit("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    if list_only:
+        done = await applied_versions(db)
+        for m in MIGRATIONS:
+            record = done.get(m.version)
+            state = f"{record['state']} {record.get('applied_at') or record.get('started_at')}" if record else "pending"
+            print(f"{m.version:4}  {state:40}  {m.name}")
+        return
+    applied = await apply(db, target)
+    if not applied:
+        print("Nothing to apply", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply database migrations")
+    parser.add_argument("--list", action="store_true", help="show migration state and exit")
+    parser.add_argument("--to", type=int, help="highest version to apply")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(run(args.to, args.list))
+    except RuntimeError as e:
+        raise SystemExit(str(e))
+
+
+if __name__ == "__main__":
+    main()
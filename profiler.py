@@ -0,0 +1,104 @@
+"""
+Sampling Profiler
+
+Statistical profiler for a live worker. A background thread snapshots the
+event loop thread's stack at a fixed interval and counts identical stacks.
+The app itself is not instrumented, so nothing is paid while no profile is
+running.
+
+Output is the collapsed-stack format (`frame;frame;frame count` per line),
+which flamegraph.pl, speedscope and similar tools read directly.
+
+Samples can be limited to one route. A sample belongs to a route when the
+route's endpoint function is on the sampled stack; for a suspended
+coroutine chain that is the case whenever the loop is running code on the
+request's behalf.
+"""
+
+import os
+import sys
+import threading
+from collections import Counter
+from typing import Dict, Optional, Set
+
+
+def _frame_name(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Profiler:
+    """Samples one thread's stack into collapsed-stack counts"""
+
+    def __init__(self, thread_id: int, interval: float, only: Optional[Set] = None):
+        self.thread_id = thread_id
+        self.interval = interval
+        # Code objects of the endpoints to keep samples for (None keeps all)
+        self.only = only
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            self._sample(frame)
+
+    def _sample(self, frame):
+        self.samples += 1
+        names = []
+        matched = self.only is None
+        while frame is not None:
+            code = frame.f_code
+            if not matched and code in self.only:
+                matched = True
+            names.append(_frame_name(code))
+            frame = frame.f_back
+        if matched:
+            self.stacks[";".join(reversed(names))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+_lock = threading.Lock()
+_running: Optional[Profiler] = None
+
+
+def endpoint_codes(routes, path: Optional[str]) -> Optional[Set]:
+    """Code objects of the endpoints serving `path` (None for every route)"""
+    if path is None:
+        return None
+    codes = set()
+    for route in routes:
+        if getattr(route, "path", None) == path and hasattr(route, "endpoint"):
+            codes.add(route.endpoint.__code__)
+    return codes
+
+
+def begin(interval: float, only: Optional[Set] = None) -> Optional[Profiler]:
+    """Start profiling the calling thread; None if a profile is already running"""
+    global _running
+    with _lock:
+        if _running is not None:
+            return None
+        _running = Profiler(threading.get_ident(), interval, only)
+    _running.start()
+    return _running
+
+
+def end(profiler: Profiler) -> Dict:
+    global _running
+    profiler.stop()
+    with _lock:
+        _running = None
+    return {"samples": profiler.samples, "kept": sum(profiler.stacks.values())}
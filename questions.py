@@ -0,0 +1,120 @@
+"""
+Test Question Set
+
+The questionnaire served by /api/test/questions, compiled once per
+published version into an immutable object holding the encoded response
+body and its strong ETag. Requests only pick up the current object; the
+database is read again only when a new version is published.
+
+The published version lives in the `questionset` collection
+(`{"_id": "current", "version": n}`). After changing the `testquestion`
+documents, publish them from a migration with `await publish(db)`; every
+worker notices the new version within QUESTIONS_REFRESH_SECONDS. A
+published set that fails validation is logged and the current one kept.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from pydantic import ValidationError
+from pymongo import ReturnDocument
+
+from schemas import TestQuestion
+from serialize import dumps
+
+logger = logging.getLogger(__name__)
+
+REFRESH_SECONDS = int(os.getenv("QUESTIONS_REFRESH_SECONDS", "30"))
+MAX_AGE_SECONDS = int(os.getenv("QUESTIONS_MAX_AGE_SECONDS", "300"))
+
+
+class QuestionSet:
+    """One immutable, encoded version of the questionnaire"""
+
+    __slots__ = ("version", "questions", "body", "etag", "headers")
+
+    def __init__(self, version: str, questions: Sequence[TestQuestion]):
+        self.version = version
+        self.questions: Tuple[TestQuestion, ...] = tuple(questions)
+        self.body = dumps([q.model_dump() for q in self.questions])
+        digest = hashlib.blake2b(self.body, digest_size=8).hexdigest()
+        self.etag = f'"{version}-{digest}"'
+        self.headers = {
+            "ETag": self.etag,
+            "Cache-Control": f"public, max-age={MAX_AGE_SECONDS}, must-revalidate",
+        }
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Whether an If-None-Match header names this version"""
+        if not if_none_match:
+            return False
+        tags = [t.strip() for t in if_none_match.split(",")]
+        return "*" in tags or any(t.removeprefix("W/") == self.etag for t in tags)
+
+
+async def published_version(db) -> int:
+    doc = await db["questionset"].find_one({"_id": "current"})
+    return doc["version"] if doc else 0
+
+
+async def publish(db) -> int:
+    """Mark the current `testquestion` documents as a new version"""
+    doc = await db["questionset"].find_one_and_update(
+        {"_id": "current"},
+        {"$inc": {"version": 1}, "$set": {"published_at": datetime.now(timezone.utc)}},
+        upsert=True, return_document=ReturnDocument.AFTER,
+    )
+    return doc["version"]
+
+
+class QuestionStore:
+    """Holds the current QuestionSet and swaps in newly published versions"""
+
+    def __init__(self):
+        self.current: Optional[QuestionSet] = None
+        # Called with no arguments after a new version is swapped in
+        self.listeners: List[Callable[[], None]] = []
+        self._task = None
+
+    async def refresh(self, db):
+        version = await published_version(db)
+        if self.current is not None and self.current.version == f"v{version}":
+            return
+        docs = await db["testquestion"].find({}).sort("step", 1).to_list(length=None)
+        try:
+            questions = [TestQuestion(**d) for d in docs]
+        except ValidationError as e:
+            logger.error("Rejected question set v%d, keeping %s: %s", version,
+                         self.current.version if self.current else "none", e)
+            return
+        self.current = QuestionSet(f"v{version}", questions)
+        logger.info("Loaded question set v%d (%d questions)", version, len(docs))
+        for listener in self.listeners:
+            listener()
+
+    def watch(self, db):
+        """Poll for newly published versions in a background task"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._follow(db))
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _follow(self, db):
+        from pymongo.errors import PyMongoError
+
+        while True:
+            await asyncio.sleep(REFRESH_SECONDS)
+            try:
+                await self.refresh(db)
+            except PyMongoError as e:
+                logger.warning("Question set reload failed: %s", e)
+
+
+question_store = QuestionStore()
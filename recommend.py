@@ -0,0 +1,202 @@
+"""
+Career Recommendations
+
+Ranks careers for a test submission with bitset arithmetic. The current
+answer rules (see rules.py) are compiled once per catalog and rule version
+into one bitset over the catalog per answer. A submission looks up the
+bitsets of its answers and counts, per career, how many of them it is in:
+a bit-sliced counter built from AND/XOR over whole words, so the cost
+depends on the number of answers and words, not on a loop over careers.
+Careers in every answer's set (the AND of all of them) come first, then
+those missing one, and so on; within a tier careers keep catalog order.
+
+Only the set of answers that have rules affects the ranking, so results
+are memoized under that canonical key. Whenever the catalog, the rules or
+the question set change, a background thread rebuilds the model and ranks
+every combination of the questionnaire's options up front (432 for the
+five-step test); bursts of changes are coalesced into one rebuild.
+Submissions are then a dict lookup. Until a rebuild finishes, the
+previous model keeps answering. A process that forks workers calls
+`foreground()` first: it then builds only when `build()` is called, so no
+rebuild thread can hold the model lock across a fork.
+"""
+
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from catalog import CareerCatalog, catalog
+from fixtures import TEST_QUESTIONS
+from questions import question_store
+from rules import RuleStore, bit_positions, bitset, compile_rules, rule_store
+from schemas import AnswerRule
+
+logger = logging.getLogger(__name__)
+
+TOP_K = 6
+# Seconds to wait for more changes before rebuilding
+REBUILD_DELAY = float(os.getenv("RECOMMEND_REBUILD_DELAY", "0.2"))
+# Memo entries allowed beyond the precomputed combinations (odd answer lists)
+MEMO_EXTRA = 4096
+
+
+def question_options() -> List[List[str]]:
+    """Option keys of each step of the current questionnaire"""
+    current = question_store.current
+    questions = current.questions if current is not None else TEST_QUESTIONS
+    return [[option["key"] for option in q.options] for q in questions]
+
+
+class _Model:
+    """Compiled rules and memoized rankings for one catalog and rule version"""
+
+    def __init__(self, rows: Sequence[dict], rules: Sequence[AnswerRule], version: tuple):
+        self.version = version
+        self.ids = [row["id"] for row in rows]
+        self.bitsets: Dict[str, np.ndarray] = compile_rules(rules, rows)
+        # Bits of real careers, to mask the padding of the last word
+        self.valid = bitset(np.ones(len(rows), dtype=bool))
+        self.memo: Dict[Tuple[str, ...], List[str]] = {}
+        self._limit = MEMO_EXTRA
+
+    def key(self, answers: Sequence[str]) -> Tuple[str, ...]:
+        """Canonical memo key: the distinct answers that have rules, sorted"""
+        return tuple(sorted({a for a in answers if a in self.bitsets}))
+
+    def precompute(self, steps: Sequence[Sequence[str]]):
+        """Rank every combination of one option per step"""
+        for combination in itertools.product(*steps):
+            key = self.key(combination)
+            if key not in self.memo:
+                self.memo[key] = self.top(key, TOP_K)
+        self._limit = len(self.memo) + MEMO_EXTRA
+
+    def ranked(self, answers: Sequence[str]) -> List[str]:
+        """Memoized top TOP_K"""
+        key = self.key(answers)
+        ids = self.memo.get(key)
+        if ids is None:
+            ids = self.top(key, TOP_K)
+            if len(self.memo) < self._limit:
+                self.memo[key] = ids
+        return ids
+
+    def counts(self, answers: Sequence[str]) -> Optional[List[np.ndarray]]:
+        """Bit-sliced per-career count of matched answers (bit j of every count in word j)"""
+        sets = [self.bitsets[a] for a in dict.fromkeys(answers) if a in self.bitsets]
+        if not sets:
+            return None
+        counter = [np.zeros_like(self.valid) for _ in range(len(sets).bit_length())]
+        for carry in sets:
+            for j in range(len(counter)):
+                counter[j], carry = counter[j] ^ carry, counter[j] & carry
+        return counter
+
+    def top(self, answers: Sequence[str], k: int) -> List[str]:
+        if not self.ids:
+            return []
+        counter = self.counts(answers)
+        if counter is None:
+            return self.ids[:k]
+        picked: List[int] = []
+        for score in range((1 << len(counter)) - 1, 0, -1):
+            tier = self.valid.copy()
+            for j, bits in enumerate(counter):
+                tier &= bits if score >> j & 1 else ~bits
+            if tier.any():
+                picked.extend(bit_positions(tier)[:k - len(picked)].tolist())
+                if len(picked) >= k:
+                    break
+        return [self.ids[i] for i in picked]
+
+
+class Recommender:
+    """Recommendation engine that follows a CareerCatalog and a RuleStore"""
+
+    def __init__(self, source: CareerCatalog, rules: RuleStore,
+                 answer_space: Callable[[], List[List[str]]] = question_options):
+        self._source = source
+        self._rules = rules
+        self._answer_space = answer_space
+        self._lock = threading.Lock()
+        self._model: Optional[_Model] = None
+        self._stale = threading.Event()
+        self._worker_pid = None
+        self._foreground_pid = None
+        source.listeners.append(self.invalidate)
+        rules.listeners.append(self.invalidate)
+
+    def _version(self) -> tuple:
+        return self._source.version, self._rules.version
+
+    def build(self) -> _Model:
+        """The model for the current catalog and rules, built now if needed"""
+        with self._lock:
+            model = self._model
+            rules_version, rules = self._rules.current
+            version = (self._source.version, rules_version)
+            if model is None or model.version != version:
+                model = _Model(self._source.rows(), rules, version)
+                model.precompute(self._answer_space())
+                self._model = model
+            return model
+
+    def model(self) -> _Model:
+        """The latest built model; only the first call waits for a build"""
+        model = self._model
+        if model is None:
+            model = self.build()
+        return model
+
+    def foreground(self):
+        """Never start the rebuild thread in this process (a pre-fork master)"""
+        self._foreground_pid = os.getpid()
+
+    def invalidate(self):
+        """Schedule a rebuild; safe to call from any thread"""
+        self._stale.set()
+        if self._foreground_pid == os.getpid():
+            return
+        # Threads do not survive a fork, so each process starts its own
+        if self._worker_pid != os.getpid():
+            self._worker_pid = os.getpid()
+            threading.Thread(target=self._rebuild_loop, name="recommender", daemon=True).start()
+
+    def _rebuild_loop(self):
+        while True:
+            self._stale.wait()
+            time.sleep(REBUILD_DELAY)
+            self._stale.clear()
+            try:
+                started, previous = time.perf_counter(), self._model
+                model = self.build()
+                if model is previous:
+                    # Questionnaire changes keep the version; extend the precomputed set
+                    model.precompute(self._answer_space())
+                else:
+                    logger.info("Recommendations rebuilt for %d careers, %d combinations in %.0f ms",
+                                len(model.ids), len(model.memo), 1000 * (time.perf_counter() - started))
+            except Exception:
+                logger.exception("Rebuilding recommendations failed")
+
+    def recommend(self, answers: Sequence[str], k: int = TOP_K) -> List[str]:
+        """Ranked career ids for a list of answer keys"""
+        model = self.model()
+        if k == TOP_K:
+            return list(model.ranked(answers))
+        return model.top(model.key(answers), k)
+
+    def stats(self) -> dict:
+        model = self._model
+        return {"version": list(model.version) if model else None,
+                "current": model is not None and model.version == self._version(),
+                "memo": len(model.memo) if model else 0}
+
+
+recommender = Recommender(catalog, rule_store)
+question_store.listeners.append(recommender.invalidate)
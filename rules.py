@@ -0,0 +1,169 @@
+"""
+Answer Rules
+
+Rules that map a test answer to the careers it points to. A rule lists
+criteria (an attribute of the career and a value it must have) and
+whether a career must meet any or all of them:
+
+    {"answer": "fix", "match": "any",
+     "criteria": [{"attr": "tags", "value": "hands-on"}, {"attr": "field", "value": "Trades"}]}
+
+Rules come from the file named by RULES_FILE (a JSON list), else from the
+`answerrule` collection when it has documents, else from DEFAULT_RULES.
+They are validated against schemas.AnswerRule as a whole; an invalid set
+is rejected and the previous one stays in use. The store checks its
+source every RULES_REFRESH_SECONDS and swaps in changed rules atomically.
+
+`compile_rules` turns a rule set into one bitset over the catalog per
+answer (see recommend.py for how submissions are ranked with them).
+"""
+
+import asyncio
+import json
+import logging
+import os
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+from pydantic import TypeAdapter, ValidationError
+
+from schemas import AnswerRule
+
+logger = logging.getLogger(__name__)
+
+RULES_FILE = os.getenv("RULES_FILE")
+REFRESH_SECONDS = int(os.getenv("RULES_REFRESH_SECONDS", "30"))
+
+
+def _rule(answer: str, *criteria: Tuple[str, str], match: str = "any") -> dict:
+    return {"answer": answer, "match": match, "criteria": [{"attr": a, "value": v} for a, v in criteria]}
+
+
+DEFAULT_RULES = [
+    _rule("fix", ("tags", "hands-on"), ("field", "Trades")),
+    _rule("help", ("tags", "helping"), ("field", "Healthcare")),
+    _rule("teach", ("tags", "teaching"), ("field", "Education")),
+    _rule("create", ("tags", "creative"), ("field", "Design")),
+    _rule("logic", ("tags", "logic"), ("field", "Engineering")),
+    _rule("govt", ("job_type", "Government")),
+    _rule("private", ("job_type", "Private")),
+    _rule("self", ("job_type", "Self-employed")),
+]
+
+_RULE_LIST = TypeAdapter(List[AnswerRule])
+
+
+def validate_rules(raw: Sequence[dict]) -> Tuple[AnswerRule, ...]:
+    """Validated rules; raises ValueError for a bad or ambiguous set"""
+    rules = _RULE_LIST.validate_python([{k: v for k, v in r.items() if k != "_id"} for r in raw])
+    answers = [r.answer for r in rules]
+    duplicates = sorted({a for a in answers if answers.count(a) > 1})
+    if duplicates:
+        raise ValueError(f"More than one rule for answers: {', '.join(duplicates)}")
+    return tuple(rules)
+
+
+def bitset(mask: np.ndarray) -> np.ndarray:
+    """Pack a boolean array into little-endian uint64 words"""
+    packed = np.packbits(mask, bitorder="little")
+    packed = np.pad(packed, (0, -len(packed) % 8))
+    return packed.view(np.uint64)
+
+
+def bit_positions(words: np.ndarray) -> np.ndarray:
+    """Indexes of the set bits, ascending"""
+    return np.flatnonzero(np.unpackbits(words.view(np.uint8), bitorder="little"))
+
+
+def compile_rules(rules: Sequence[AnswerRule], rows: Sequence[dict]) -> Dict[str, np.ndarray]:
+    """One bitset over `rows` (catalog order) per answer"""
+    wanted = {(c.attr, c.value) for r in rules for c in r.criteria}
+    attrs = {attr for attr, _ in wanted}
+    masks = {f: np.zeros(len(rows), dtype=bool) for f in wanted}
+    # One pass over the careers, looking up only the attributes rules use
+    for i, row in enumerate(rows):
+        for attr in attrs:
+            present = row.get(attr)
+            for value in (present if isinstance(present, list) else (present,)):
+                mask = masks.get((attr, value))
+                if mask is not None:
+                    mask[i] = True
+    compiled = {}
+    for rule in rules:
+        criteria = [masks[(c.attr, c.value)] for c in rule.criteria]
+        combined = np.logical_or.reduce(criteria) if rule.match == "any" else np.logical_and.reduce(criteria)
+        compiled[rule.answer] = bitset(combined)
+    return compiled
+
+
+class RuleStore:
+    """Current validated rule set, swapped atomically on reload"""
+
+    def __init__(self):
+        # (version, rules) replaced as one object so readers never see a mix
+        self.current: Tuple[int, Tuple[AnswerRule, ...]] = (1, validate_rules(DEFAULT_RULES))
+        self.source = "default"
+        # Called with no arguments after a new rule set is swapped in
+        self.listeners: List[Callable[[], None]] = []
+        self._task = None
+        self._loaded = None
+
+    @property
+    def version(self) -> int:
+        return self.current[0]
+
+    @property
+    def rules(self) -> Tuple[AnswerRule, ...]:
+        return self.current[1]
+
+    def replace(self, raw: Sequence[dict], source: str) -> bool:
+        """Validate and swap in a rule set; False if it is unchanged"""
+        rules = validate_rules(raw)
+        if rules == self.rules:
+            self.source = source
+            return False
+        self.current = (self.version + 1, rules)
+        self.source = source
+        logger.info("Loaded %d answer rules from %s (version %d)", len(rules), source, self.version)
+        for listener in self.listeners:
+            listener()
+        return True
+
+    async def refresh(self, db=None):
+        """Reload from the configured source if it changed"""
+        if RULES_FILE:
+            mtime = os.stat(RULES_FILE).st_mtime_ns
+            if mtime == self._loaded:
+                return
+            with open(RULES_FILE, encoding="utf-8") as f:
+                raw = json.load(f)
+            source, self._loaded = RULES_FILE, mtime
+        else:
+            docs = await db["answerrule"].find({}).sort("answer", 1).to_list(length=None) if db is not None else []
+            raw, source = (docs, "answerrule") if docs else (DEFAULT_RULES, "default")
+        try:
+            self.replace(raw, source)
+        except (ValidationError, ValueError) as e:
+            logger.error("Rejected answer rules from %s, keeping version %d: %s", source, self.version, e)
+
+    def watch(self, db=None):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._follow(db))
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _follow(self, db):
+        from pymongo.errors import PyMongoError
+
+        while True:
+            await asyncio.sleep(REFRESH_SECONDS)
+            try:
+                await self.refresh(db)
+            except (OSError, PyMongoError, json.JSONDecodeError) as e:
+                logger.warning("Answer rules reload failed: %s", e)
+
+
+rule_store = RuleStore()
@@ -3,9 +3,13 @@ Database Schemas for CareerPath
 
 Each Pydantic model here maps to a MongoDB collection whose name is the lowercase
 of the class name. Example: Career -> "career" collection.
+
+INDEXES at the bottom declares the indexes each collection needs; they are
+synced at startup (see database.sync_indexes).
 """
 from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional, Literal
+from pymongo import ASCENDING, IndexModel
+from typing import Dict, List, Optional, Literal
 
 # Core domain models
 class Career(BaseModel):
@@ -24,10 +28,17 @@ class Career(BaseModel):
     growth_path_en: List[str] = Field(default_factory=list, description="Simple timeline labels (English)")
     growth_path_te: List[str] = Field(default_factory=list, description="Simple timeline labels (Telugu)")
 
+class CareerBatch(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=300, description="Career ObjectId strings, in the order wanted back")
+
 class SavedCareer(BaseModel):
     user_id: str = Field(..., description="Logical user id or 'guest-<device>'")
     career_id: str = Field(..., description="ObjectId string for the career")
 
+class SavedCareerBatch(BaseModel):
+    user_id: str = Field(..., description="Logical user id or 'guest-<device>'")
+    career_ids: List[str] = Field(..., min_length=1, max_length=200, description="ObjectId strings of the careers to save")
+
 class TestQuestion(BaseModel):
     step: int = Field(..., ge=1)
     question_en: str
@@ -42,6 +53,15 @@ class TestResult(BaseModel):
     user_id: Optional[str] = None
     recommended_ids: List[str]
 
+class RuleCriterion(BaseModel):
+    attr: Literal['tags', 'field', 'job_type', 'education', 'skills']
+    value: str
+
+class AnswerRule(BaseModel):
+    answer: str = Field(..., min_length=1, description="Answer option key the rule applies to")
+    match: Literal['any', 'all'] = Field('any', description="Whether a career must meet any or all criteria")
+    criteria: List[RuleCriterion] = Field(..., min_length=1)
+
 class Counselor(BaseModel):
     name: str
     phone: str
@@ -51,3 +71,28 @@ class ContactMessage(BaseModel):
     name: str
     email: EmailStr
     message: str
+
+# Indexes per collection, keyed by collection name
+INDEXES: Dict[str, List[IndexModel]] = {
+    "career": [
+        IndexModel([("field", ASCENDING)], name="field"),
+        IndexModel([("education", ASCENDING)], name="education"),
+        IndexModel([("tags", ASCENDING)], name="tags"),
+        IndexModel([("job_type", ASCENDING)], name="job_type"),
+        # Key the importer and the seed migration upsert on
+        IndexModel([("name_en", ASCENDING)], name="name_en"),
+    ],
+    # Unique pair makes saving idempotent; its user_id prefix serves per-user listing
+    "savedcareer": [
+        IndexModel([("user_id", ASCENDING), ("career_id", ASCENDING)], name="user_career", unique=True),
+    ],
+    "testquestion": [
+        IndexModel([("step", ASCENDING)], name="step"),
+    ],
+    # Spooled messages are shipped at least once; the key (the id, or the
+    # sender email plus Idempotency-Key) drops repeats and client retries
+    "contactmessage": [
+        IndexModel([("dedupe_key", ASCENDING)], name="dedupe_key", unique=True,
+                   partialFilterExpression={"dedupe_key": {"$exists": True}}),
+    ],
+}
@@ -0,0 +1,36 @@
+"""
+JSON Serialization
+
+Encodes response bodies once and serves the bytes as-is. Uses orjson when
+it is installed and falls back to the standard library otherwise; both
+produce the same bytes as FastAPI's default JSONResponse (compact
+separators, UTF-8 without escaping non-ASCII).
+"""
+
+import json
+from typing import Any, Iterable
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode a JSON-compatible object to bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def join_array(items: Iterable[bytes]) -> bytes:
+    """JSON array from already-encoded items"""
+    return b"[" + b",".join(items) + b"]"
+
+
+class JSONBytes(Response):
+    """Response for a body that is already encoded JSON"""
+
+    media_type = "application/json"
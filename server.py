@@ -0,0 +1,142 @@
+"""
+Production Server
+
+Runs the API under gunicorn with uvicorn workers:
+
+    python server.py
+
+The app is imported in the master before forking, together with the career
+catalog, its encoded cards and the recommendation model, so every worker
+shares those pages copy-on-write instead of building its own copy. Workers
+use uvloop and httptools when they are installed.
+
+    kill -HUP <master pid>   reload the catalog in the master, then replace
+                             the workers one by one; old workers finish
+                             their in-flight requests before exiting
+    kill -TERM <master pid>  graceful shutdown
+
+Each worker answers GET /health with its pid, uptime and catalog state;
+worker boots and exits are logged by the master.
+
+Settings (environment):
+    PORT               listen port (default 8000)
+    WEB_CONCURRENCY    worker count (default: one per CPU)
+    GRACEFUL_TIMEOUT   seconds a worker gets to drain on reload/shutdown (30)
+    WORKER_TIMEOUT     seconds without a heartbeat before a worker is killed (60)
+    KEEPALIVE          HTTP keep-alive seconds (5)
+"""
+
+import gc
+import importlib.util
+import logging
+import os
+
+from gunicorn.app.base import BaseApplication
+from uvicorn.workers import UvicornWorker
+
+logger = logging.getLogger("server")
+
+LOOP = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+HTTP = "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+class Worker(UvicornWorker):
+    CONFIG_KWARGS = {"loop": LOOP, "http": HTTP}
+
+
+def worker_count() -> int:
+    if os.getenv("WEB_CONCURRENCY"):
+        return int(os.environ["WEB_CONCURRENCY"])
+    # The app is async, so one worker per core keeps every core busy
+    return os.cpu_count() or 1
+
+
+def preload_catalog():
+    """Load the catalog and derived data in the master process
+
+    Uses a short-lived synchronous client: a Motor client must not be used
+    before forking, and the app's own client stays untouched until each
+    worker starts its event loop.
+    """
+    from pymongo import MongoClient
+
+    import database
+    from catalog import PROJECTION, catalog
+    from recommend import recommender
+
+    if database.db is None:
+        return
+    # Builds happen right here, so no rebuild thread runs when gunicorn forks
+    recommender.foreground()
+    client = MongoClient(database.database_url,
+                         serverSelectionTimeoutMS=database.server_selection_timeout_ms)
+    try:
+        catalog.load(client[database.database_name]["career"].find({}, PROJECTION).sort("_id", 1))
+    except Exception as e:
+        # Workers load the catalog themselves at startup
+        logger.warning("Catalog preload failed: %s", e)
+        return
+    finally:
+        client.close()
+    if catalog.card_encoder is not None:
+        for doc in catalog.rows():
+            catalog.card_json(doc)
+    recommender.build()
+    logger.info("Preloaded %d careers (catalog version %d)", len(catalog), catalog.version)
+
+
+def on_reload(arbiter):
+    preload_catalog()
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    from catalog import catalog
+
+    worker.log.info("Worker %s ready (loop=%s, http=%s, careers=%d)", worker.pid, LOOP, HTTP, len(catalog))
+
+
+def child_exit(server, worker):
+    server.log.info("Worker %s exited", worker.pid)
+
+
+class Server(BaseApplication):
+    """gunicorn application that preloads main:app"""
+
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for name, value in self.options.items():
+            self.cfg.set(name, value)
+
+    def load(self):
+        from main import app
+
+        preload_catalog()
+        # Keep the preloaded objects out of the collector so its passes do
+        # not touch (and un-share) their pages in the workers
+        gc.freeze()
+        return app
+
+
+def run():
+    logging.basicConfig(level=logging.INFO)
+    Server({
+        "bind": f"0.0.0.0:{int(os.getenv('PORT', 8000))}",
+        "workers": worker_count(),
+        "worker_class": "server.Worker",
+        "preload_app": True,
+        "graceful_timeout": int(os.getenv("GRACEFUL_TIMEOUT", "30")),
+        "timeout": int(os.getenv("WORKER_TIMEOUT", "60")),
+        "keepalive": int(os.getenv("KEEPALIVE", "5")),
+        "on_reload": on_reload,
+        "post_worker_init": post_worker_init,
+        "child_exit": child_exit,
+        "accesslog": "-",
+    }).run()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,278 @@
+"""
+Durable Spool
+
+Append-only local log that a request can commit to without waiting for
+MongoDB, drained into a collection by a background shipper. Used by
+/api/contact so messages survive database outages and restarts.
+
+Each process appends to its own directory, `SPOOL_DIR/<name>/<pid>/`,
+made of numbered segment files. Every record is length-prefixed and
+checksummed, so a torn write at the tail is detected and discarded on
+recovery. Appends are group-committed: records arriving while an fsync is
+running share the next one, so a burst of requests costs one fsync instead
+of one each.
+
+The shipper reads committed records past its cursor (`cursor.json`, stored
+after every shipped batch) and inserts them unordered in bulk, then
+deletes fully shipped segments. Delivery is at-least-once: a record
+shipped again after a crash carries the same `_id` and `dedupe_key`, and
+the resulting duplicate-key errors are ignored. Spools of processes that
+are gone are adopted and drained by a live one.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+import struct
+import zlib
+from typing import List, Optional, Tuple
+
+from bson import json_util
+from pymongo.errors import PyMongoError
+
+import database
+from writebehind import pid_alive
+
+logger = logging.getLogger(__name__)
+
+SPOOL_DIR = os.getenv("SPOOL_DIR", "spool")
+SEGMENT_BYTES = int(os.getenv("SPOOL_SEGMENT_BYTES", str(16 * 1024 * 1024)))
+SHIP_INTERVAL = float(os.getenv("SPOOL_SHIP_SECONDS", "1"))
+SHIP_BATCH = int(os.getenv("SPOOL_SHIP_BATCH", "1000"))
+
+# Record header: payload length, CRC32 of the payload
+_HEADER = struct.Struct("<II")
+
+
+def read_records(path: str, start: int, limit: Optional[int] = None) -> List[Tuple[int, dict]]:
+    """(end offset, document) of each intact record in a segment from `start`
+
+    Stops at the first truncated or corrupt record.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(None if limit is None else max(0, limit - start))
+    records = []
+    pos = 0
+    while pos + _HEADER.size <= len(data):
+        length, crc = _HEADER.unpack_from(data, pos)
+        end = pos + _HEADER.size + length
+        payload = data[pos + _HEADER.size:end]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            break
+        records.append((start + end, json_util.loads(payload)))
+        pos = end
+    return records
+
+
+def _segments(directory: str) -> List[int]:
+    return sorted(int(name[:-4]) for name in os.listdir(directory) if name.endswith(".seg"))
+
+
+def _segment_path(directory: str, seq: int) -> str:
+    return os.path.join(directory, f"{seq:012d}.seg")
+
+
+class Spool:
+    """Segment log for one collection with a background shipper"""
+
+    def __init__(self, name: str, collection: str, directory: str = SPOOL_DIR,
+                 segment_bytes: int = SEGMENT_BYTES, ship_interval: float = SHIP_INTERVAL,
+                 batch_size: int = SHIP_BATCH):
+        self.name = name
+        self.collection = collection
+        self.root = os.path.join(directory, name)
+        self.segment_bytes = segment_bytes
+        self.ship_interval = ship_interval
+        self.batch_size = batch_size
+        self.dir: Optional[str] = None
+        self._fd: Optional[int] = None
+        self._seq = 0
+        self._size = 0
+        # Committed (fsynced) end of the active segment, as (seq, size)
+        self._durable = (0, 0)
+        self._pending: List[Tuple[bytes, asyncio.Future]] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self.appended = 0
+        self.shipped = 0
+
+    # Writing
+    def open(self):
+        """Recover this process's spool directory and start committing and shipping"""
+        if self._tasks:
+            return
+        self.dir = os.path.join(self.root, str(os.getpid()))
+        os.makedirs(self.dir, exist_ok=True)
+        existing = _segments(self.dir)
+        if existing:
+            # Same pid as an earlier run: drop a torn tail, then start a fresh segment
+            last = _segment_path(self.dir, existing[-1])
+            records = read_records(last, 0)
+            os.truncate(last, records[-1][0] if records else 0)
+        self._seq = existing[-1] + 1 if existing else 0
+        self._open_segment()
+        self._wake = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._commit_loop()), loop.create_task(self._ship_loop())]
+
+    def _open_segment(self):
+        self._fd = os.open(_segment_path(self.dir, self._seq), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._size = 0
+        self._durable = (self._seq, 0)
+
+    async def append(self, doc: dict):
+        """Append a document and return once it is on disk"""
+        payload = json_util.dumps(doc, json_options=json_util.CANONICAL_JSON_OPTIONS).encode()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((_HEADER.pack(len(payload), zlib.crc32(payload)) + payload, future))
+        self._wake.set()
+        await future
+        self.appended += 1
+
+    async def _commit_loop(self):
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            batch, self._pending = self._pending, []
+            if not batch:
+                continue
+            try:
+                await asyncio.to_thread(self._write, b"".join(record for record, _ in batch))
+            except OSError as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+    def _write(self, data: bytes):
+        if self._size and self._size + len(data) > self.segment_bytes:
+            os.close(self._fd)
+            self._seq += 1
+            self._open_segment()
+        os.write(self._fd, data)
+        os.fsync(self._fd)
+        self._size += len(data)
+        self._durable = (self._seq, self._size)
+
+    async def close(self):
+        """Commit pending appends, ship what the database accepts and stop"""
+        if not self._tasks:
+            return
+        while self._pending:
+            self._wake.set()
+            await asyncio.sleep(0.001)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if database.db is not None:
+            try:
+                await self._ship(self.dir, active=self._durable)
+            except PyMongoError as e:
+                logger.warning("%s spool not fully shipped at shutdown (%s); it is kept on disk", self.name, e)
+        os.close(self._fd)
+        self._fd = None
+
+    # Shipping
+    async def _ship_loop(self):
+        while True:
+            await asyncio.sleep(self.ship_interval)
+            if database.db is None:
+                continue
+            try:
+                await self._ship(self.dir, active=self._durable)
+                for path in await asyncio.to_thread(self._adopt):
+                    await self._ship(path, active=None)
+                    shutil.rmtree(path, ignore_errors=True)
+            except PyMongoError as e:
+                logger.warning("Shipping the %s spool failed: %s", self.name, e)
+
+    def _adopt(self) -> List[str]:
+        """Claim spool directories of processes that are gone
+
+        A directory is claimed by renaming it to `<pid>.adopted-<our pid>`,
+        which only one process can do.
+        """
+        adopted = []
+        for name in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, name)
+            if not name.split(".")[0].isdigit():
+                continue
+            owner = int(name.rsplit("-", 1)[1]) if ".adopted-" in name else int(name)
+            if owner == os.getpid():
+                if ".adopted-" in name:
+                    adopted.append(path)
+                continue
+            if pid_alive(owner):
+                continue
+            target = os.path.join(self.root, f"{name.split('.')[0]}.adopted-{os.getpid()}")
+            try:
+                os.rename(path, target)
+            except OSError:
+                continue
+            adopted.append(target)
+        return adopted
+
+    async def _ship(self, directory: str, active: Optional[Tuple[int, int]]):
+        """Ship every committed record in `directory` past its cursor
+
+        `active` is the segment still being written and its committed size;
+        None when nothing writes to the directory any more.
+        """
+        seq, offset = self._read_cursor(directory)
+        for segment in _segments(directory):
+            if segment < seq:
+                os.remove(_segment_path(directory, segment))
+                continue
+            if active and segment > active[0]:
+                break
+            if segment > seq:
+                seq, offset = segment, 0
+            path = _segment_path(directory, segment)
+            limit = active[1] if active and segment == active[0] else None
+            while True:
+                records = await asyncio.to_thread(read_records, path, offset, limit)
+                if not records:
+                    break
+                for i in range(0, len(records), self.batch_size):
+                    chunk = records[i:i + self.batch_size]
+                    await database.insert_many_ignoring_duplicates(self.collection, [doc for _, doc in chunk])
+                    offset = chunk[-1][0]
+                    self.shipped += len(chunk)
+                    self._write_cursor(directory, seq, offset)
+                if limit is None or offset >= limit:
+                    break
+            if not active or segment < active[0]:
+                # Complete segment: everything intact in it has been shipped
+                os.remove(path)
+                seq, offset = segment + 1, 0
+                self._write_cursor(directory, seq, offset)
+
+    @staticmethod
+    def _read_cursor(directory: str) -> Tuple[int, int]:
+        try:
+            with open(os.path.join(directory, "cursor.json")) as f:
+                cursor = json.load(f)
+            return cursor["segment"], cursor["offset"]
+        except FileNotFoundError:
+            return 0, 0
+
+    @staticmethod
+    def _write_cursor(directory: str, seq: int, offset: int):
+        tmp = os.path.join(directory, "cursor.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"segment": seq, "offset": offset}, f)
+        os.replace(tmp, os.path.join(directory, "cursor.json"))
+
+    def stats(self) -> dict:
+        return {"appended": self.appended, "shipped": self.shipped, "pending_commit": len(self._pending),
+                "segment": self._seq, "segment_bytes": self._size}
+
+
+contact_spool = Spool("contact", "contactmessage")
@@ -0,0 +1,268 @@
+"""
+Telugu Text Helpers
+
+Normalization, grapheme (akshara) splitting and Latin romanization used by
+the career search indexes. Romanized keys are deliberately loose so that
+what users type on an English keyboard ("nars", "upadhyayudu") lands on
+the same key as the Telugu name.
+"""
+
+import re
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+VIRAMA = "్"
+_JOINERS = {"\u200c", "\u200d"}
+
+_VOWELS = {
+    "అ": "a", "ఆ": "aa", "ఇ": "i", "ఈ": "ii", "ఉ": "u", "ఊ": "uu", "ఋ": "ru",
+    "ౠ": "ruu", "ఎ": "e", "ఏ": "ee", "ఐ": "ai", "ఒ": "o", "ఓ": "oo", "ఔ": "au",
+}
+_SIGNS = {
+    "ా": "aa", "ి": "i", "ీ": "ii", "ు": "u", "ూ": "uu", "ృ": "ru", "ౄ": "ruu",
+    "ె": "e", "ే": "ee", "ై": "ai", "ొ": "o", "ో": "oo", "ౌ": "au",
+}
+_CONSONANTS = {
+    "క": "k", "ఖ": "kh", "గ": "g", "ఘ": "gh", "ఙ": "ng",
+    "చ": "ch", "ఛ": "chh", "జ": "j", "ఝ": "jh", "ఞ": "ny",
+    "ట": "t", "ఠ": "th", "డ": "d", "ఢ": "dh", "ణ": "n",
+    "త": "t", "థ": "th", "ద": "d", "ధ": "dh", "న": "n",
+    "ప": "p", "ఫ": "ph", "బ": "b", "భ": "bh", "మ": "m",
+    "య": "y", "ర": "r", "ఱ": "r", "ల": "l", "ళ": "l", "వ": "v",
+    "శ": "sh", "ష": "sh", "స": "s", "హ": "h",
+}
+_MODIFIERS = {"ఁ": "n", "ం": "m", "ః": "h"}
+
+# Applied in order to both romanized names and typed queries so that common
+# spelling variants collapse onto one key.
+_LOOSE = [
+    ("chh", "ch"), ("aa", "a"), ("ee", "i"), ("ii", "i"), ("oo", "u"), ("uu", "u"),
+    ("kh", "k"), ("gh", "g"), ("th", "t"), ("dh", "d"), ("ph", "f"), ("bh", "b"),
+    ("jh", "j"), ("sh", "s"), ("w", "v"), ("z", "j"), ("q", "k"), ("x", "ks"),
+]
+_C_NOT_CH = re.compile(r"c(?!h)")
+_REPEATS = re.compile(r"(.)\1+")
+_NON_LATIN = re.compile(r"[^a-z ]+")
+
+
+def normalize(text: Optional[str]) -> str:
+    """NFC-normalize, drop zero-width joiners and lowercase"""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFC", text)
+    return "".join(ch for ch in text if ch not in _JOINERS).lower()
+
+
+def is_telugu(ch: str) -> bool:
+    return "\u0c00" <= ch <= "\u0c7f"
+
+
+def has_telugu(text: str) -> bool:
+    return any(is_telugu(ch) for ch in text)
+
+
+def _is_consonant(ch: str) -> bool:
+    return ch in _CONSONANTS or "\u0c58" <= ch <= "\u0c5a"
+
+
+def graphemes(text: str) -> List[str]:
+    """Split text into grapheme clusters
+
+    Combining marks attach to the preceding cluster and a virama followed by
+    a consonant forms a conjunct, so "నర్స్" splits into ["న", "ర్స్"].
+    """
+    clusters: List[str] = []
+    prev = ""
+    for ch in text:
+        attach = clusters and (
+            unicodedata.category(ch) in ("Mn", "Mc", "Me")
+            or (prev == VIRAMA and _is_consonant(ch))
+        )
+        if attach:
+            clusters[-1] += ch
+        else:
+            clusters.append(ch)
+        prev = ch
+    return clusters
+
+
+def romanize(text: str) -> str:
+    """Transliterate Telugu script to plain Latin letters"""
+    out = []
+    pending = False  # consonant still carrying its inherent "a"
+    for ch in normalize(text):
+        if ch in _CONSONANTS:
+            if pending:
+                out.append("a")
+            out.append(_CONSONANTS[ch])
+            pending = True
+            continue
+        if ch in _SIGNS:
+            out.append(_SIGNS[ch])
+        elif ch == VIRAMA:
+            pass
+        elif ch in _MODIFIERS:
+            if pending:
+                out.append("a")
+            out.append(_MODIFIERS[ch])
+        elif ch in _VOWELS:
+            if pending:
+                out.append("a")
+            out.append(_VOWELS[ch])
+        else:
+            if pending:
+                out.append("a")
+            out.append(ch if ch.isascii() else " ")
+        pending = False
+    if pending:
+        out.append("a")
+    return "".join(out)
+
+
+def latin_key(text: str) -> str:
+    """Loose phonetic key for romanized text"""
+    key = _NON_LATIN.sub(" ", text.lower())
+    key = _C_NOT_CH.sub("k", key)
+    for a, b in _LOOSE:
+        key = key.replace(a, b)
+    return " ".join(_REPEATS.sub(r"\1", key).split())
+
+
+class NgramIndex:
+    """Substring index over unit sequences (grapheme clusters or letters)
+
+    Each word is indexed by its unit unigrams and bigrams, with "^" marking
+    the word start. Lookups narrow candidates with the grams and then verify
+    against the stored text, so results are exact substring matches.
+    `plan` leaves the verification to the caller, so that a limited search
+    only checks the candidates it actually walks.
+    """
+
+    def __init__(self, split, partial_last: bool = True):
+        self._split = split
+        self._partial_last = partial_last
+        self._grams: Dict[Tuple[str, ...], Set[int]] = {}
+        self._text: Dict[int, str] = {}
+        self._units: List[str] = []
+        self._units_dirty = False
+        self._prefixes: Dict[str, Set[int]] = {}
+
+    def _word_grams(self, text: str) -> Set[Tuple[str, ...]]:
+        grams = set()
+        for word in text.split():
+            units = ["^"] + self._split(word)
+            for i in range(1, len(units)):
+                grams.add((units[i],))
+                grams.add((units[i - 1], units[i]))
+        return grams
+
+    def add(self, n: int, text: str):
+        if not text:
+            return
+        self._text[n] = text
+        self._prefixes.clear()
+        for gram in self._word_grams(text):
+            posting = self._grams.get(gram)
+            if posting is None:
+                posting = self._grams[gram] = set()
+                if len(gram) == 1:
+                    self._units_dirty = True
+            posting.add(n)
+
+    def remove(self, n: int):
+        text = self._text.pop(n, None)
+        if text is None:
+            return
+        self._prefixes.clear()
+        for gram in self._word_grams(text):
+            posting = self._grams.get(gram)
+            if posting is not None:
+                posting.discard(n)
+                if not posting:
+                    del self._grams[gram]
+                    self._units_dirty = len(gram) == 1 or self._units_dirty
+
+    def _unit_prefix(self, prefix: str) -> Set[int]:
+        """Ordinals containing a unit that starts with prefix"""
+        cached = self._prefixes.get(prefix)
+        if cached is not None:
+            return cached
+        if self._units_dirty:
+            self._units = sorted(g[0] for g in self._grams if len(g) == 1)
+            self._units_dirty = False
+        units = self._units
+        i = bisect_left(units, prefix)
+        matched = set()
+        while i < len(units) and units[i].startswith(prefix):
+            matched |= self._grams[(units[i],)]
+            i += 1
+        if matched:
+            self._prefixes[prefix] = matched
+        return matched
+
+    def contains(self, n: int, query: str) -> bool:
+        return query in self._text.get(n, "")
+
+    def plan(self, query: str) -> Tuple[List[Set[int]], bool]:
+        """Posting sets, smallest first, whose intersection holds every match
+
+        The flag tells whether members of the intersection must still be
+        verified with `contains`. No sets means nothing can match.
+        """
+        words = query.split()
+        if not words:
+            return [], False
+        hits: List[Set[int]] = []
+        exact = len(words) == 1
+        for w, word in enumerate(words):
+            units = self._split(word)
+            if w > 0:
+                units = ["^"] + units
+            partial = self._partial_last and w == len(words) - 1
+            complete = len(units) - 1 if partial else len(units)
+            for i in range(complete):
+                if units[i] != "^":
+                    hits.append(self._grams.get((units[i],), set()))
+                if i:
+                    hits.append(self._grams.get((units[i - 1], units[i]), set()))
+            if partial:
+                hits.append(self._unit_prefix(units[-1]))
+            # A lone unit or bigram is matched exactly by its posting
+            exact = exact and (len(units) == 1 or (len(units) == 2 and not partial))
+        hits.sort(key=len)
+        if not hits or not hits[0]:
+            return [], False
+        return hits, not exact
+
+    def search(self, query: str) -> Set[int]:
+        """Ordinals whose text contains query; the last unit may be partial"""
+        hits, verify = self.plan(query)
+        if not hits:
+            return set()
+        result = hits[0]
+        for other in hits[1:]:
+            if not result:
+                return set()
+            result = result & other
+        if not verify:
+            return result
+        return {n for n in result if self.contains(n, query)}
+
+
+def letters(word: str) -> List[str]:
+    return list(word)
+
+
+def telugu_index() -> NgramIndex:
+    """Grapheme n-gram index over normalized Telugu text"""
+    return NgramIndex(graphemes)
+
+
+def latin_index() -> NgramIndex:
+    """Letter n-gram index over romanized keys"""
+    return NgramIndex(letters, partial_last=False)
+
+
+def romanized_keys(values: Iterable[str]) -> str:
+    return " ".join(k for k in (latin_key(romanize(v)) for v in values if v) if k)
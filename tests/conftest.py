@@ -0,0 +1,67 @@
+"""Shared fixtures: an in-memory Motor database and an app bound to it"""
+
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+import database
+import main
+import migrations
+import writebehind
+from cache import MemoryBackend, response_cache
+from catalog import catalog
+from recommend import recommender
+from schemas import INDEXES
+from spool import contact_spool
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """A fresh in-memory database with the migrations applied"""
+    mdb = AsyncMongoMockClient()["careerpath_test"]
+    monkeypatch.setattr(database, "db", mdb)
+    monkeypatch.setattr(main, "db", mdb)
+    asyncio.run(migrations.apply(mdb))
+    asyncio.run(database.sync_indexes(INDEXES))
+    return mdb
+
+
+@pytest.fixture
+def app(db, monkeypatch, tmp_path):
+    """The app with its local spools under tmp_path and an empty cache"""
+    monkeypatch.setattr(contact_spool, "root", str(tmp_path / "spool" / "contact"))
+    monkeypatch.setattr(contact_spool, "ship_interval", 0.05)
+    monkeypatch.setattr(writebehind.test_results, "journal_dir", str(tmp_path / "spool"))
+    monkeypatch.setattr(writebehind.test_results, "flush_interval", 0.05)
+    monkeypatch.setattr(response_cache, "backend", MemoryBackend())
+    return main.app
+
+
+@pytest.fixture
+def client(app, db):
+    """A TestClient running the app's startup and shutdown hooks"""
+    # mongomock has no change streams, so load the catalog here rather than
+    # through the watcher
+    asyncio.run(catalog.refresh(db["career"]))
+    recommender.build()
+    with TestClient(app) as client:
+        yield client
+
+
+def wait_for(condition, timeout: float = 5.0):
+    """Poll `condition` until it is truthy; fails the test on timeout"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.02)
+
+
+async def until(condition, timeout: float = 5.0):
+    """`wait_for` for code running on an event loop"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
@@ -0,0 +1,130 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+from pymongo.errors import ServerSelectionTimeoutError
+
+from catalog import catalog
+from conftest import wait_for
+from questions import question_store
+
+
+def documents(db, name, query=None):
+    return asyncio.run(db[name].find(query or {}).to_list(length=None))
+
+
+def test_health(client):
+    body = client.get("/health").json()
+    assert body["status"] == "ok"
+    assert body["database"] is True
+    assert body["catalog"]["careers"] == 3
+
+
+def test_starts_while_the_database_is_down(app, db, monkeypatch):
+    async def unreachable(*args, **kwargs):
+        raise ServerSelectionTimeoutError("connection refused")
+
+    monkeypatch.setattr(db, "command", unreachable)
+    monkeypatch.setattr(catalog, "version", 0)
+    monkeypatch.setattr(catalog, "refresh", unreachable)
+    monkeypatch.setattr(question_store, "refresh", unreachable)
+    with TestClient(app) as client:
+        assert client.get("/health").json()["status"] == "ok"
+
+
+def test_careers_pages_with_cursor(client):
+    first = client.get("/api/careers", params={"limit": 2})
+    assert len(first.json()) == 2
+    cursor = first.headers["X-Next-Cursor"]
+    rest = client.get("/api/careers", params={"limit": 2, "cursor": cursor})
+    assert len(rest.json()) == 1
+    assert "X-Next-Cursor" not in rest.headers
+    ids = [c["id"] for c in first.json() + rest.json()]
+    assert ids == sorted(ids)
+
+
+def test_careers_only_requested_fields(client):
+    cards = client.get("/api/careers", params={"fields": "name_en"}).json()
+    assert all(set(card) == {"id", "name_en"} for card in cards)
+    assert client.get("/api/careers", params={"fields": "secret"}).status_code == 400
+
+
+def test_careers_search(client):
+    def names(**params):
+        return [c["name_en"] for c in client.get("/api/careers", params=params).json()]
+
+    assert names(q="nurse") == ["Nurse"]
+    assert names(q="నర్") == ["Nurse"]
+    assert names(q="nars") == ["Nurse"]
+    assert names(field="Trades") == ["Electrician"]
+    assert names(q="zzz") == []
+    assert names(q="\u200c\u200d") == []
+
+
+def test_cors_exposes_pagination_headers(client):
+    response = client.get("/api/careers", params={"limit": 1}, headers={"Origin": "http://example.com"})
+    exposed = {h.strip().lower() for h in response.headers["access-control-expose-headers"].split(",")}
+    assert {"x-next-cursor", "etag"} <= exposed
+
+
+def test_career_detail_and_batch(client):
+    cid = client.get("/api/careers").json()[0]["id"]
+    assert client.get(f"/api/careers/{cid}").json()["id"] == cid
+    assert client.get("/api/careers/" + "0" * 24).status_code == 404
+
+    missing = "0" * 24
+    body = client.post("/api/careers:batch", json={"ids": [cid, missing, cid]}).json()
+    assert [c["id"] for c in body["careers"]] == [cid, cid]
+    assert body["missing"] == [missing]
+
+
+def test_save_is_idempotent(client):
+    cid = client.get("/api/careers").json()[0]["id"]
+    assert client.post("/api/save", json={"user_id": "u1", "career_id": cid}).json()["status"] == "ok"
+    assert client.post("/api/save", json={"user_id": "u1", "career_id": cid}).json()["status"] == "exists"
+
+    saved = client.get("/api/saved/u1", params={"embed": True})
+    assert [s["career_id"] for s in saved.json()] == [cid]
+    assert saved.json()[0]["career"]["id"] == cid
+    again = client.get("/api/saved/u1", params={"embed": True}, headers={"If-None-Match": saved.headers["ETag"]})
+    assert again.status_code == 304
+
+
+def test_questions_etag(client):
+    response = client.get("/api/test/questions")
+    assert len(response.json()) == 5
+    again = client.get("/api/test/questions", headers={"If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 304
+
+
+def test_submit_recommends_and_stores_result(client, db):
+    answers = ["help", "in", "secure", "people", "govt"]
+    body = client.post("/api/test/submit", json={"user_id": "u1", "answers": answers}).json()
+    nurse = client.get("/api/careers", params={"q": "nurse"}).json()[0]["id"]
+    assert body["recommended_ids"][0] == nurse
+
+    wait_for(lambda: documents(db, "testresult"))
+    (result,) = documents(db, "testresult")
+    assert result["answers"] == answers
+    assert result["recommended_ids"] == body["recommended_ids"]
+
+
+def test_counselors(client):
+    assert client.get("/api/counselors").json()
+
+
+def test_contact_dedupe_is_scoped_by_email(client, db):
+    def send(email, key):
+        message = {"name": "A", "email": email, "message": "hi"}
+        response = client.post("/api/contact", json=message, headers={"Idempotency-Key": key})
+        assert response.json() == {"status": "received"}
+
+    send("a@example.com", "k1")
+    send("a@example.com", "k1")
+    send("b@example.com", "k1")
+    wait_for(lambda: len(documents(db, "contactmessage")) == 2)
+    keys = sorted(d["dedupe_key"] for d in documents(db, "contactmessage"))
+    assert keys == ["a@example.com:k1", "b@example.com:k1"]
+
+
+def test_admin_requires_token(client):
+    assert client.get("/admin/profile").status_code == 403
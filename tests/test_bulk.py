@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+from pymongo.errors import BulkWriteError
+
+import database
+
+
+@pytest.fixture
+def unique_k(db):
+    asyncio.run(db["bulk"].create_index("k", unique=True))
+    return db["bulk"]
+
+
+def keys(collection):
+    return sorted(d["k"] for d in asyncio.run(collection.find({}).to_list(length=None)))
+
+
+def test_create_documents_reports_per_batch(unique_k):
+    stats = asyncio.run(database.create_documents("bulk", ({"k": i} for i in range(5)), batch_size=2))
+    assert [(s["batch"], s["count"], s["inserted"], s["errors"]) for s in stats] == [
+        (0, 2, 2, 0), (1, 2, 2, 0), (2, 1, 1, 0)]
+    assert keys(unique_k) == [0, 1, 2, 3, 4]
+    doc = asyncio.run(unique_k.find_one({"k": 0}))
+    assert doc["created_at"] == doc["updated_at"]
+
+
+def test_unordered_writes_report_errors_and_continue(unique_k):
+    stats = asyncio.run(database.create_documents("bulk", [{"k": 1}, {"k": 1}, {"k": 2}, {"k": 2}]))
+    assert (stats[0]["inserted"], stats[0]["errors"]) == (2, 2)
+    assert [e["index"] for e in stats[0]["write_errors"]] == [1, 3]
+    assert keys(unique_k) == [1, 2]
+
+
+def test_ordered_writes_raise_at_the_first_error(unique_k):
+    with pytest.raises(BulkWriteError):
+        asyncio.run(database.create_documents("bulk", [{"k": 1}, {"k": 1}, {"k": 2}], ordered=True))
+    assert keys(unique_k) == [1]
+
+
+def test_upserts_keep_created_at(unique_k):
+    asyncio.run(database.upsert_documents("bulk", [{"k": 1, "v": "a"}], key="k"))
+    created = asyncio.run(unique_k.find_one({"k": 1}))["created_at"]
+    stats = asyncio.run(database.upsert_documents("bulk", [{"k": 1, "v": "b"}, {"k": 2, "v": "c"}], key="k"))
+    assert (stats[0]["matched"], stats[0]["upserted"]) == (1, 1)
+    doc = asyncio.run(unique_k.find_one({"k": 1}))
+    assert (doc["v"], doc["created_at"]) == ("b", created)
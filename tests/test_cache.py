@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+from cache import MemoryBackend, ResponseCache, make_key
+
+
+def test_make_key_is_stable_and_skips_empty_values():
+    assert make_key(b="2", a=" 1 ", c=None, d="") == make_key(a="1", b="2") == "a=1&b=2"
+
+
+def test_concurrent_misses_load_once():
+    cache, calls = ResponseCache(MemoryBackend()), []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return b"body"
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_load("career", "k", load) for _ in range(10)))
+
+    assert asyncio.run(run()) == [b"body"] * 10
+    assert len(calls) == 1
+    assert asyncio.run(cache.get_or_load("career", "k", load)) == b"body"
+    assert len(calls) == 1
+
+
+def test_failed_load_reaches_every_waiter_and_is_not_cached():
+    cache = ResponseCache(MemoryBackend())
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_load("career", "k", fail) for _ in range(3)),
+                                    return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(run()))
+    assert asyncio.run(cache.peek("career", "k")) is None
+
+
+def test_invalidated_mid_load_is_not_stored():
+    cache = ResponseCache(MemoryBackend())
+
+    async def load():
+        await asyncio.sleep(0.01)
+        return b"stale"
+
+    async def run():
+        task = asyncio.ensure_future(cache.get_or_load("career", "k", load))
+        await asyncio.sleep(0)
+        cache.invalidate("career")
+        assert await task == b"stale"
+
+    asyncio.run(run())
+    assert asyncio.run(cache.peek("career", "k")) is None
+
+
+def test_invalidate_drops_only_its_namespace():
+    cache = ResponseCache(MemoryBackend())
+
+    async def run():
+        await cache.put("career", "a", b"1")
+        await cache.put("counselor", "a", b"2")
+        cache.invalidate("career")
+        return await cache.peek("career", "a"), await cache.peek("counselor", "a")
+
+    assert asyncio.run(run()) == (None, b"2")
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_entries=2)
+
+    async def run():
+        await backend.set("a", 1, 60)
+        await backend.set("b", 2, 60)
+        await backend.get("a")
+        await backend.set("c", 3, 60)
+        return [await backend.get(k) for k in "abc"]
+
+    assert asyncio.run(run()) == [1, None, 3]
+    assert backend.evictions == 1
+
+
+def test_memory_backend_expires_entries(monkeypatch):
+    backend = MemoryBackend()
+    asyncio.run(backend.set("a", 1, 10))
+    later = time.monotonic() + 11
+    monkeypatch.setattr(time, "monotonic", lambda: later)
+    assert asyncio.run(backend.get("a")) is None
+    assert backend.expirations == 1
@@ -0,0 +1,37 @@
+import random
+
+import pytest
+
+from careerstore import CareerStore
+from fixtures import CAREERS
+
+
+def test_rows_read_back_as_written():
+    rng = random.Random(3)
+    store, expected = CareerStore(), {}
+    for step in range(3000):
+        n = rng.randrange(200)
+        if rng.random() < 0.2:
+            store.clear(n)
+            expected[n] = {}
+            continue
+        doc = {**CAREERS[rng.randrange(len(CAREERS))].model_dump(), "id": str(step),
+               "tags": [f"tag{rng.randrange(50)}" for _ in range(rng.randrange(6))]}
+        del doc["salary_max"]
+        store.put(n, doc)
+        expected[n] = doc
+    for n, doc in expected.items():
+        row = store.row(n)
+        for name in store.fields:
+            default = [] if isinstance(CAREERS[0].model_dump().get(name), list) else None
+            assert row.get(name) == doc.get(name, default)
+    with pytest.raises(KeyError):
+        store.row(next(iter(expected)))["salary_max"]
+
+
+def test_normalize_accepts_whole_number_doubles_only():
+    store = CareerStore()
+    assert store.normalize({"salary_min": 15000.0})["salary_min"] == 15000
+    for bad in (1.5, -1, True, "15000"):
+        with pytest.raises(ValueError):
+            store.normalize({"salary_min": bad})
@@ -0,0 +1,181 @@
+import asyncio
+import random
+
+from pymongo.errors import ServerSelectionTimeoutError
+
+import catalog as catalog_module
+from catalog import CareerCatalog
+from fixtures import CAREERS
+from telugu import graphemes, latin_index, romanize
+
+
+def career(_id: str, **fields) -> dict:
+    return {**CAREERS[0].model_dump(), "_id": _id, **fields}
+
+
+def loaded(*docs) -> CareerCatalog:
+    catalog = CareerCatalog()
+    catalog.load(docs)
+    return catalog
+
+
+def ids(rows) -> list:
+    return [row["id"] for row in rows]
+
+
+def test_graphemes_and_romanize():
+    assert graphemes("నర్స్") == ["న", "ర్స్"]
+    assert romanize("నర్స్") == "nars"
+
+
+def test_ngram_index_finds_substrings():
+    index = latin_index()
+    words = ["electrician", "teacher", "nurse", "technician"]
+    for n, word in enumerate(words):
+        index.add(n, word)
+    for query in ("ici", "tech", "ur", "e"):
+        assert index.search(query) >= {n for n, w in enumerate(words) if query in w}
+        assert {n for n in index.search(query) if index.contains(n, query)} == {
+            n for n, w in enumerate(words) if query in w}
+
+
+def test_search_by_name_in_either_script():
+    catalog = loaded(*(dict(c.model_dump(), _id=f"{i:02d}") for i, c in enumerate(CAREERS)))
+    assert ids(catalog.search(q="nurse")) == ["00"]
+    assert ids(catalog.search(q="NUR")) == ["00"]
+    assert ids(catalog.search(q="నర్")) == ["00"]
+    assert ids(catalog.search(q="nars")) == ["00"]
+    assert ids(catalog.search(field="Trades")) == ["01"]
+    assert ids(catalog.search(q="helping")) == ["00", "02"]
+    assert ids(catalog.search(q="hands-on")) == ["01"]
+    assert ids(catalog.search(q="\u200c")) == []
+
+    catalog.upsert(career("03", name_en="Nursery Teacher", tags=[]))
+    for typed in ("nur", "nurs", "nurse"):
+        assert ids(catalog.search(q=typed)) == ["00", "03"]
+    assert ids(catalog.search(q="nurser")) == ["03"]
+
+
+def test_pages_follow_id_order():
+    rng = random.Random(4)
+    docs = [career(f"{i:04d}", field=rng.choice("AB"), name_en=f"Nurse {i}") for i in range(300)]
+    catalog = loaded(*docs)
+    expected = [d["_id"] for d in docs if d["field"] == "A"]
+    pages, after = [], None
+    while True:
+        page = ids(catalog.search(q="nur", field="A", limit=7, after=after))
+        if not page:
+            break
+        pages += page
+        after = page[-1]
+    assert pages == expected
+
+
+def test_upsert_and_remove():
+    catalog = loaded(career("a"), career("b"))
+    catalog.upsert(career("a", name_en="Plumber"))
+    assert ids(catalog.search(q="plumb")) == ["a"]
+    assert ids(catalog.search(q="nurse")) == ["b"]
+    catalog.remove("b")
+    assert len(catalog) == 1 and catalog.get("b") is None
+
+
+def test_unchanged_reload_keeps_the_version():
+    docs = [career("a"), career("b")]
+    catalog = loaded(*docs)
+    version = catalog.version
+    assert catalog.load([dict(d) for d in docs]) is False
+    assert catalog.version == version
+    assert catalog.load([docs[0]]) is True
+    assert catalog.version == version + 1
+
+
+def test_whole_number_double_salaries_are_stored():
+    catalog = loaded(career("a", salary_min=15000.0), career("b", salary_min=1.5))
+    assert ids(catalog.rows()) == ["a"]
+    assert catalog.get("a")["salary_min"] == 15000
+    assert isinstance(catalog.get("a")["salary_min"], int)
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *args):
+        return self
+
+    async def to_list(self, length=None):
+        return list(self.docs)
+
+
+class _Stream:
+    def __init__(self, events):
+        self.events = events
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.events:
+            await asyncio.sleep(10)
+        event = self.events.pop(0)
+        if event["operationType"] == "invalidate":
+            self.events = []
+            raise StopAsyncIteration
+        return event
+
+
+class _Collection:
+    """Stand-in for a Motor collection whose first change stream is invalidated"""
+
+    def __init__(self, unreachable: int = 0):
+        self.docs = [career("a")]
+        self.opened = 0
+        self.unreachable = unreachable
+
+    def find(self, *args):
+        return _Cursor(self.docs)
+
+    def watch(self, **kwargs):
+        if self.unreachable:
+            self.unreachable -= 1
+            raise ServerSelectionTimeoutError("connection refused")
+        self.opened += 1
+        if self.opened == 1:
+            return _Stream([{"operationType": "drop"}, {"operationType": "invalidate"}])
+        self.docs = [career("b")]
+        return _Stream([])
+
+
+def test_watch_reopens_the_stream_after_it_ends():
+    async def run():
+        catalog, collection = CareerCatalog(), _Collection()
+        catalog.watch(collection)
+        await asyncio.sleep(0.2)
+        catalog.stop()
+        return catalog, collection
+
+    catalog, collection = asyncio.run(run())
+    assert collection.opened == 2
+    assert ids(catalog.rows()) == ["b"]
+
+
+def test_watch_retries_an_unreachable_server(monkeypatch):
+    monkeypatch.setattr(catalog_module, "RETRY_SECONDS", 0.01)
+
+    async def run():
+        catalog, collection = CareerCatalog(), _Collection(unreachable=2)
+        catalog.watch(collection)
+        await asyncio.sleep(0.2)
+        catalog.stop()
+        return catalog, collection
+
+    catalog, collection = asyncio.run(run())
+    assert collection.opened == 2
+    assert ids(catalog.rows()) == ["b"]
@@ -0,0 +1,44 @@
+import asyncio
+import json
+
+import import_careers
+from fixtures import CAREERS
+
+
+def row(name: str) -> dict:
+    return {**CAREERS[0].model_dump(), "name_en": name}
+
+
+def test_imports_upserts_and_rejects(db, tmp_path):
+    path = tmp_path / "careers.jsonl"
+    lines = [json.dumps(row("Nurse")), json.dumps(row("Pilot")), '{"name_en": "Torn', json.dumps({"name_en": "Bad"})]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    asyncio.run(import_careers.run(str(path), "jsonl", batch_size=2, workers=1, key="name_en",
+                                   insert=False, resume=False))
+
+    names = sorted(d["name_en"] for d in asyncio.run(db["career"].find({}).to_list(length=None)))
+    assert names == sorted([c.name_en for c in CAREERS] + ["Pilot"])
+    rejected = [json.loads(line) for line in (tmp_path / "careers.jsonl.rejected.jsonl").read_text().splitlines()]
+    assert [r["offset"] for r in rejected] == [2, 3]
+    assert import_careers.read_checkpoint(str(path)) == 4
+    indexes = asyncio.run(db["career"].index_information())
+    assert any(next(iter(spec["key"]))[0] == "name_en" for spec in indexes.values())
+
+
+def test_rows_the_server_refuses_are_rejected(db, tmp_path):
+    asyncio.run(db["career"].create_index("name_en", unique=True))
+    path = tmp_path / "careers.jsonl"
+    path.write_text("\n".join(json.dumps(row(name)) for name in ("Pilot", "Nurse", "Chef")) + "\n", encoding="utf-8")
+
+    asyncio.run(import_careers.run(str(path), "jsonl", batch_size=10, workers=1, key="name_en",
+                                   insert=True, resume=False))
+
+    rejected = [json.loads(line) for line in (tmp_path / "careers.jsonl.rejected.jsonl").read_text().splitlines()]
+    assert [(r["offset"], r["record"]["name_en"]) for r in rejected] == [(1, "Nurse")]
+    assert import_careers.read_checkpoint(str(path)) == 3
+
+
+def test_csv_list_cells():
+    assert import_careers.parse_record({"tags": "a| b", "skills": '["x"]'}) == {"tags": ["a", "b"], "skills": ["x"]}
+    assert import_careers.parse_record({"tags": ""}) == {"tags": []}
@@ -0,0 +1,36 @@
+import asyncio
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+import database
+from schemas import INDEXES
+
+
+def test_declared_indexes_are_in_sync(db):
+    # The db fixture has synced them once already
+    report = asyncio.run(database.sync_indexes(INDEXES))
+    assert all(not r["created"] and not r["changed"] and not r["errors"] for r in report.values())
+    names = asyncio.run(db["contactmessage"].index_information())
+    assert "dedupe_key" in names
+
+
+def test_drift_is_reported_not_changed(db):
+    collection = db["drift"]
+    asyncio.run(collection.create_index([("a", DESCENDING)], name="by_a"))
+    asyncio.run(collection.create_index("legacy", name="legacy"))
+    asyncio.run(collection.insert_many([{"u": 1}, {"u": 1}]))
+    registry = {"drift": [
+        IndexModel([("a", ASCENDING)], name="by_a"),
+        IndexModel([("b", ASCENDING)], name="by_b"),
+        IndexModel([("u", ASCENDING)], name="unique_u", unique=True),
+    ]}
+
+    report = asyncio.run(database.sync_indexes(registry))["drift"]
+
+    assert report["created"] == ["by_b"]
+    assert report["changed"] == ["by_a"]
+    assert report["undeclared"] == ["legacy"]
+    assert [e.split(":")[0] for e in report["errors"]] == ["unique_u"]
+    existing = asyncio.run(collection.index_information())
+    assert list(existing["by_a"]["key"]) == [("a", DESCENDING)]
+    assert "legacy" in existing and "unique_u" not in existing
@@ -0,0 +1,67 @@
+import time
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import metrics
+from metrics import Counter, Histogram, MetricsMiddleware, command_metrics, serializing
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, "/a")
+    assert histogram.render()[2:] == [
+        'latency_seconds_bucket{route="/a",le="0.1"} 1',
+        'latency_seconds_bucket{route="/a",le="1.0"} 2',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 3',
+        'latency_seconds_sum{route="/a"} 5.55',
+        'latency_seconds_count{route="/a"} 3',
+    ]
+
+
+def test_counter_escapes_label_values():
+    counter = Counter("things_total", "Things", ("name",))
+    counter.inc('say "hi"\n')
+    counter.inc('say "hi"\n', amount=2)
+    assert counter.render()[2:] == ['things_total{name="say \\"hi\\"\\n"} 3']
+
+
+def command_event(request_id: int, micros: int = 0):
+    return SimpleNamespace(command_name="find", command={"find": "career"}, connection_id=("h", 1),
+                           request_id=request_id, duration_micros=micros)
+
+
+def test_requests_are_charged_their_db_and_serialize_time():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics-test/{item}")
+    def item(item: str):
+        command_metrics.started(command_event(1))
+        command_metrics.succeeded(command_event(1, micros=2000))
+        with serializing():
+            with serializing():
+                time.sleep(0.01)
+        return {}
+
+    with TestClient(app) as client:
+        client.get("/metrics-test/1")
+        client.get("/metrics-test/2")
+
+    text = metrics.render().decode()
+    labels = 'method="GET",route="/metrics-test/{item}"'
+    assert f'http_requests_total{{{labels},status="200"}} 2' in text
+    assert f"http_request_db_seconds_sum{{{labels}}} 0.004" in text
+    serialize_sum = next(line for line in text.splitlines()
+                         if line.startswith(f"http_request_serialize_seconds_sum{{{labels}}}"))
+    assert 0.02 <= float(serialize_sum.split()[-1]) < 0.5
+    assert 'mongodb_command_duration_seconds_count{collection="career",command="find"}' in text
+
+
+def test_metrics_endpoint(client):
+    client.get("/health")
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_requests_total{method="GET",route="/health",status="200"}' in response.text
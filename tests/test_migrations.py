@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import database
+import migrations
+from fixtures import CAREERS
+
+
+@pytest.fixture
+def empty_db(monkeypatch):
+    mdb = AsyncMongoMockClient()["careerpath_test"]
+    monkeypatch.setattr(database, "db", mdb)
+    return mdb
+
+
+def count(db, name):
+    return asyncio.run(db[name].count_documents({}))
+
+
+def test_seeds_an_empty_database_once(empty_db):
+    versions = [m.version for m in migrations.MIGRATIONS]
+    assert asyncio.run(migrations.apply(empty_db)) == versions
+    assert count(empty_db, "career") == len(CAREERS)
+    assert asyncio.run(migrations.apply(empty_db)) == []
+    assert count(empty_db, "career") == len(CAREERS)
+
+
+def test_collections_with_documents_are_not_seeded(empty_db):
+    asyncio.run(empty_db["career"].insert_one({"name_en": "Imported"}))
+    asyncio.run(migrations.apply(empty_db))
+    assert count(empty_db, "career") == 1
+    assert count(empty_db, "counselor") > 0
+
+
+def test_unfinished_migration_stops_the_run(empty_db):
+    asyncio.run(empty_db["migration"].insert_one({"_id": 1, "state": "running"}))
+    with pytest.raises(RuntimeError):
+        asyncio.run(migrations.apply(empty_db))
+
+
+def test_seeds_the_database_it_is_given(empty_db):
+    other = AsyncMongoMockClient()["careerpath_other"]
+    asyncio.run(migrations.apply(other))
+    assert count(other, "career") == len(CAREERS)
+    assert count(empty_db, "career") == 0
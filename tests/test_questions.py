@@ -0,0 +1,21 @@
+import asyncio
+
+from questions import QuestionStore, publish
+
+
+def test_invalid_published_set_keeps_the_current_one(db):
+    store = QuestionStore()
+    asyncio.run(store.refresh(db))
+    current = store.current
+    assert len(current.questions) == 5
+
+    asyncio.run(db["testquestion"].insert_one({"step": 6, "question_en": "No options"}))
+    asyncio.run(publish(db))
+    asyncio.run(store.refresh(db))
+    assert store.current is current
+
+    asyncio.run(db["testquestion"].delete_one({"step": 6}))
+    asyncio.run(publish(db))
+    asyncio.run(store.refresh(db))
+    assert store.current.version != current.version
+    assert len(store.current.questions) == 5
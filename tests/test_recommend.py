@@ -0,0 +1,52 @@
+import itertools
+import random
+
+from catalog import CareerCatalog
+from fixtures import CAREERS
+from recommend import Recommender
+from rules import RuleStore
+
+FIELDS = ["Trades", "Healthcare", "Education", "Design", "Engineering"]
+TAGS = ["hands-on", "helping", "teaching", "creative", "logic"]
+JOB_TYPES = ["Government", "Private", "Self-employed"]
+STEPS = [["fix", "help", "teach", "create", "logic"], ["govt", "private", "self"]]
+
+
+def brute_force(rules, rows, answers, k):
+    def matches(rule, row):
+        hits = [row.get(c.attr) == c.value or c.value in (row.get(c.attr) or ()) for c in rule.criteria]
+        return any(hits) if rule.match == "any" else all(hits)
+
+    by_answer = {r.answer: r for r in rules}
+    used = [by_answer[a] for a in dict.fromkeys(answers) if a in by_answer]
+    scores = [sum(matches(rule, row) for rule in used) for row in rows]
+    order = sorted(range(len(rows)), key=lambda i: -scores[i])
+    return [rows[i]["id"] for i in order if scores[i] or not used][:k]
+
+
+def test_rankings_match_brute_force():
+    rng = random.Random(7)
+    catalog = CareerCatalog()
+    catalog.load([{**CAREERS[0].model_dump(), "_id": f"{i:04d}", "field": rng.choice(FIELDS),
+                   "tags": rng.sample(TAGS, 2), "job_type": rng.choice(JOB_TYPES)} for i in range(500)])
+    rules = RuleStore()
+    recommender = Recommender(catalog, rules, answer_space=lambda: STEPS)
+    model = recommender.build()
+    rows = catalog.rows()
+    for answers in itertools.chain(itertools.product(*STEPS), [("help", "help", "unknown"), ()]):
+        expected = brute_force(rules.rules, rows, answers, 6)
+        assert model.top(model.key(answers), 6) == expected
+        assert recommender.recommend(list(answers), k=6) == expected
+        assert recommender.recommend(list(answers))[:6] == expected
+
+
+def test_model_follows_the_catalog():
+    catalog = CareerCatalog()
+    catalog.load([{**CAREERS[0].model_dump(), "_id": "a"}])
+    recommender = Recommender(catalog, RuleStore(), answer_space=lambda: STEPS)
+    recommender.foreground()
+    assert recommender.recommend(["help"]) == ["a"]
+    catalog.upsert({**CAREERS[0].model_dump(), "_id": "b"})
+    assert recommender.stats()["current"] is False
+    recommender.build()
+    assert recommender.recommend(["help"]) == ["a", "b"]
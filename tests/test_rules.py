@@ -0,0 +1,86 @@
+import asyncio
+import json
+import os
+
+import numpy as np
+import pytest
+
+import rules
+from rules import DEFAULT_RULES, RuleStore, bit_positions, bitset, compile_rules, validate_rules
+
+TEACH = {"answer": "teach", "criteria": [{"attr": "field", "value": "Education"}]}
+
+
+def test_validation_rejects_bad_and_ambiguous_sets():
+    with pytest.raises(ValueError):
+        validate_rules([{"answer": "x", "criteria": [{"attr": "salary", "value": "1"}]}])
+    with pytest.raises(ValueError):
+        validate_rules([{"answer": "x", "criteria": []}])
+    with pytest.raises(ValueError, match="teach"):
+        validate_rules([TEACH, TEACH])
+
+
+def test_bitsets_round_trip():
+    mask = np.zeros(130, dtype=bool)
+    mask[[0, 63, 64, 129]] = True
+    assert bit_positions(bitset(mask)).tolist() == [0, 63, 64, 129]
+
+
+def test_compile_rules_any_and_all():
+    rows = [{"field": "Education", "tags": ["helping"]}, {"field": "Education", "tags": []}, {"field": "Trades"}]
+    compiled = compile_rules(validate_rules([
+        TEACH,
+        {"answer": "both", "match": "all", "criteria": [{"attr": "field", "value": "Education"},
+                                                        {"attr": "tags", "value": "helping"}]},
+    ]), rows)
+    assert bit_positions(compiled["teach"]).tolist() == [0, 1]
+    assert bit_positions(compiled["both"]).tolist() == [0]
+
+
+def test_replace_swaps_and_notifies_only_on_change():
+    store, notified = RuleStore(), []
+    store.listeners.append(lambda: notified.append(store.version))
+    version = store.version
+    assert store.replace(DEFAULT_RULES, "default") is False
+    assert store.replace([TEACH], "test") is True
+    assert store.current == (version + 1, validate_rules([TEACH]))
+    assert notified == [version + 1]
+
+
+def test_invalid_collection_rules_keep_the_current_set(db):
+    store = RuleStore()
+    asyncio.run(db["answerrule"].insert_one(dict(TEACH)))
+    asyncio.run(store.refresh(db))
+    assert (store.source, [r.answer for r in store.rules]) == ("answerrule", ["teach"])
+
+    current = store.current
+    asyncio.run(db["answerrule"].insert_one(dict(TEACH)))
+    asyncio.run(store.refresh(db))
+    assert store.current is current
+
+    asyncio.run(db["answerrule"].delete_many({}))
+    asyncio.run(store.refresh(db))
+    assert store.source == "default"
+    assert store.rules == validate_rules(DEFAULT_RULES)
+
+
+def test_rules_file_wins_over_the_collection(db, monkeypatch, tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps([TEACH]))
+    monkeypatch.setattr(rules, "RULES_FILE", str(path))
+    asyncio.run(db["answerrule"].insert_one({"answer": "fix", "criteria": [{"attr": "field", "value": "Trades"}]}))
+    store = RuleStore()
+    asyncio.run(store.refresh(db))
+    assert (store.source, [r.answer for r in store.rules]) == (str(path), ["teach"])
+
+    def rewrite(text: str):
+        mtime = path.stat().st_mtime_ns
+        path.write_text(text)
+        os.utime(path, ns=(mtime + 1, mtime + 1))
+
+    rewrite(json.dumps([TEACH, {"answer": "fix", "criteria": [{"attr": "field", "value": "Trades"}]}]))
+    asyncio.run(store.refresh(db))
+    assert [r.answer for r in store.rules] == ["teach", "fix"]
+    rewrite("[{}]")
+    asyncio.run(store.refresh(db))
+    assert [r.answer for r in store.rules] == ["teach", "fix"]
@@ -0,0 +1,103 @@
+import asyncio
+import os
+import subprocess
+import zlib
+
+import pytest
+from bson import ObjectId, json_util
+
+import database
+from conftest import until
+from spool import _HEADER, Spool, read_records
+
+
+def record(doc: dict) -> bytes:
+    payload = json_util.dumps(doc, json_options=json_util.CANONICAL_JSON_OPTIONS).encode()
+    return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def message(n: int) -> dict:
+    _id = ObjectId()
+    return {"_id": _id, "n": n, "dedupe_key": str(_id)}
+
+
+def dead_pid() -> int:
+    process = subprocess.Popen(["true"])
+    process.wait()
+    return process.pid
+
+
+@pytest.fixture
+def spool(db, tmp_path):
+    return Spool("contact", "contactmessage", directory=str(tmp_path), ship_interval=0.01)
+
+
+def stored(db):
+    return asyncio.run(db["contactmessage"].find({}).sort("n", 1).to_list(length=None))
+
+
+def test_appends_are_shipped(spool, db):
+    async def run():
+        spool.open()
+        await asyncio.gather(*(spool.append(message(i)) for i in range(3)))
+        await until(lambda: spool.shipped == 3)
+        await spool.close()
+
+    asyncio.run(run())
+    assert [d["n"] for d in stored(db)] == [0, 1, 2]
+
+
+def test_kept_on_disk_during_an_outage(spool, db, monkeypatch):
+    async def run():
+        monkeypatch.setattr(database, "db", None)
+        spool.open()
+        await spool.append(message(1))
+        await asyncio.sleep(0.05)
+        await spool.close()
+
+    asyncio.run(run())
+    assert stored(db) == []
+    assert spool.shipped == 0
+
+    async def restart():
+        monkeypatch.setattr(database, "db", db)
+        spool.open()
+        await spool.close()
+
+    asyncio.run(restart())
+    assert [d["n"] for d in stored(db)] == [1]
+
+
+def test_torn_tail_is_dropped_on_open(spool, db):
+    directory = os.path.join(spool.root, str(os.getpid()))
+    os.makedirs(directory)
+    intact, torn = record(message(1)), record(message(2))
+    with open(os.path.join(directory, "000000000000.seg"), "wb") as f:
+        f.write(intact + torn[:-3])
+    assert len(read_records(os.path.join(directory, "000000000000.seg"), 0)) == 1
+
+    async def run():
+        spool.open()
+        await spool.append(message(3))
+        await spool.close()
+
+    asyncio.run(run())
+    assert [d["n"] for d in stored(db)] == [1, 3]
+
+
+def test_spools_of_dead_processes_are_adopted(spool, db):
+    orphan = os.path.join(spool.root, str(dead_pid()))
+    os.makedirs(orphan)
+    doc = message(1)
+    with open(os.path.join(orphan, "000000000000.seg"), "wb") as f:
+        # Shipped twice, as after a crash between insert and cursor write
+        f.write(record(doc) + record(doc))
+
+    async def run():
+        spool.open()
+        await until(lambda: spool.shipped == 2)
+        await spool.close()
+
+    asyncio.run(run())
+    assert [d["n"] for d in stored(db)] == [1]
+    assert os.listdir(spool.root) == [str(os.getpid())]
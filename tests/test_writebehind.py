@@ -0,0 +1,132 @@
+import asyncio
+import os
+
+import pytest
+from bson import ObjectId, json_util
+from pymongo.errors import PyMongoError
+
+import database
+import writebehind
+from conftest import until
+from writebehind import WriteBehind, read_journal
+
+
+@pytest.fixture
+def writer(db, monkeypatch, tmp_path):
+    monkeypatch.setattr(writebehind, "RETRY_INTERVAL", 0.0)
+    return WriteBehind("testresult", flush_interval=0.01, journal_dir=str(tmp_path))
+
+
+def stored(db):
+    return asyncio.run(db["testresult"].count_documents({}))
+
+
+def test_writes_in_batches(writer, db):
+    async def run():
+        writer.start()
+        for i in range(5):
+            await writer.put({"n": i})
+        await writer.stop()
+
+    asyncio.run(run())
+    assert stored(db) == 5
+    assert writer.written == 5
+
+
+def test_journals_during_an_outage_and_replays(writer, db, monkeypatch):
+    async def run():
+        monkeypatch.setattr(database, "db", None)
+        writer.start()
+        for i in range(3):
+            await writer.put({"n": i})
+        await until(lambda: writer.journaled == 3)
+        assert os.path.exists(writer.journal_path)
+        monkeypatch.setattr(database, "db", db)
+        await until(lambda: writer.replayed == 3)
+        await writer.stop()
+
+    asyncio.run(run())
+    assert stored(db) == 3
+    assert not os.listdir(writer.journal_dir)
+
+
+def test_stop_journals_a_batch_being_written(writer, db, monkeypatch):
+    async def slow_outage(collection, docs):
+        await asyncio.sleep(0.2)
+        raise PyMongoError("server selection timed out")
+
+    async def run():
+        monkeypatch.setattr(database, "insert_many_ignoring_duplicates", slow_outage)
+        writer.start()
+        for i in range(3):
+            await writer.put({"n": i})
+        await asyncio.sleep(0.05)
+        await writer.stop()
+
+    asyncio.run(run())
+    assert writer.journaled == 3
+    assert len(read_journal(writer.journal_path)) == 3
+
+
+def test_replay_skips_torn_lines(writer, db, tmp_path):
+    docs = [{"_id": ObjectId(), "n": i} for i in range(2)]
+    path = tmp_path / "testresult-999999999.jsonl"
+    path.write_text("".join(json_util.dumps(d) + "\n" for d in docs) + '{"_id": {"$oid": "65', encoding="utf-8")
+    assert [d["n"] for d in read_journal(str(path))] == [0, 1]
+
+    async def run():
+        writer.start()
+        await until(lambda: writer.replayed == 2)
+        await writer.stop()
+
+    asyncio.run(run())
+    assert stored(db) == 2
+    assert not path.exists()
+
+
+def test_replay_ignores_documents_already_written(writer, db, tmp_path):
+    doc = {"_id": ObjectId(), "n": 1}
+    asyncio.run(db["testresult"].insert_one(dict(doc)))
+    (tmp_path / "testresult-999999999.jsonl").write_text(json_util.dumps(doc) + "\n", encoding="utf-8")
+
+    async def run():
+        writer.start()
+        await until(lambda: writer.replayed == 1)
+        await writer.stop()
+
+    asyncio.run(run())
+    assert stored(db) == 1
+
+
+def test_put_restarts_a_dead_flusher(writer, db):
+    async def run():
+        writer.start()
+        writer._task.cancel()
+        await asyncio.sleep(0)
+        assert writer._task.done()
+        await writer.put({"n": 1})
+        assert not writer._task.done()
+        await writer.stop()
+
+    asyncio.run(run())
+    assert stored(db) == 1
+
+
+def test_unwritable_journal_drops_the_batch(writer, db, monkeypatch, tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    writer.journal_dir = str(blocker / "journal")
+
+    async def run():
+        monkeypatch.setattr(database, "db", None)
+        writer.start()
+        await writer.put({"n": 1})
+        await asyncio.sleep(0.1)
+        assert not writer._task.done()
+        monkeypatch.setattr(database, "db", db)
+        await writer.put({"n": 2})
+        await until(lambda: writer.written == 1)
+        await writer.stop()
+
+    asyncio.run(run())
+    assert stored(db) == 1
@@ -0,0 +1,233 @@
+"""
+Write-Behind Queue
+
+Takes documents nobody reads back right away (test results) off the
+response path. `put()` stamps a document and queues it
+in memory; a background task writes queued documents with one
+`insert_many` once `batch_size` are waiting or `flush_interval` has passed.
+
+The buffer is bounded: when it is full, `put()` waits for the flusher to
+catch up, so a slow database slows callers down instead of growing memory
+without limit.
+
+When the database is unavailable, batches are appended to a local journal
+(`WRITE_BEHIND_DIR/<collection>-<pid>.jsonl`, fsynced) and replayed once
+writes succeed again, also across restarts. Every document gets its `_id`
+when it is queued, so a replay that repeats an earlier partial write only
+hits duplicate-key errors, which are ignored. Lines that do not parse (a
+write torn by a crash) are logged and skipped.
+
+The flusher logs and survives any error; if its task ends anyway, the next
+`put()` restarts it rather than letting the buffer fill up for good.
+"""
+
+import asyncio
+import glob
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import List, Optional, Union
+
+from bson import ObjectId, json_util
+from pydantic import BaseModel
+from pymongo.errors import PyMongoError
+
+import database
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_DIR = os.getenv("WRITE_BEHIND_DIR", "spool")
+MAX_BUFFER = int(os.getenv("WRITE_BEHIND_MAX_BUFFER", "10000"))
+BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "500"))
+FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_SECONDS", "0.5"))
+RETRY_INTERVAL = float(os.getenv("WRITE_BEHIND_RETRY_SECONDS", "5"))
+
+
+class WriteBehind:
+    """Buffered, batched inserts into one collection"""
+
+    def __init__(self, collection: str, max_buffer: int = MAX_BUFFER, batch_size: int = BATCH_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL, journal_dir: str = JOURNAL_DIR):
+        self.collection = collection
+        self.max_buffer = max_buffer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.journal_dir = journal_dir
+        self._queue: Optional[asyncio.Queue] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._task = None
+        self._stopping = False
+        self._retry_at = 0.0
+        self.written = 0
+        self.journaled = 0
+        self.replayed = 0
+
+    @property
+    def journal_path(self) -> str:
+        return os.path.join(self.journal_dir, f"{self.collection}-{os.getpid()}.jsonl")
+
+    def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue(self.max_buffer)
+            self._ready = asyncio.Event()
+            self._retry_at = 0.0
+            self._stopping = False
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Flush what is queued (to the journal if need be) and stop"""
+        if self._task is None:
+            return
+        # Not cancelled: a batch taken off the queue would be lost mid-write
+        self._stopping = True
+        self._ready.set()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        batch = []
+        while not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        if batch:
+            await self._write(batch)
+
+    async def put(self, data: Union[BaseModel, dict]) -> str:
+        """Queue a document for insertion; returns its id"""
+        doc = data.model_dump() if isinstance(data, BaseModel) else data.copy()
+        now = datetime.now(timezone.utc)
+        doc.setdefault("_id", ObjectId())
+        doc["created_at"] = now
+        doc["updated_at"] = now
+        if self._task is None:
+            # Not started (scripts, tests): write straight through
+            await self._write([doc])
+        else:
+            self._supervise()
+            await self._queue.put(doc)
+            if self._queue.qsize() >= self.batch_size:
+                self._ready.set()
+        return str(doc["_id"])
+
+    def stats(self) -> dict:
+        return {"queued": self._queue.qsize() if self._queue else 0, "written": self.written,
+                "journaled": self.journaled, "replayed": self.replayed}
+
+    def _supervise(self):
+        if self._task.done() and not self._stopping:
+            error = None if self._task.cancelled() else self._task.exception()
+            logger.error("%s write-behind task ended (%r), restarting it", self.collection, error)
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._ready.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._ready.clear()
+            try:
+                while not self._queue.empty():
+                    batch = []
+                    while len(batch) < self.batch_size and not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                    await self._write(batch)
+                if not self._stopping and time.monotonic() >= self._retry_at:
+                    await self._replay()
+            except Exception:
+                logger.exception("%s write-behind flush failed", self.collection)
+                self._retry_at = time.monotonic() + RETRY_INTERVAL
+
+    async def _write(self, batch: List[dict]):
+        try:
+            await database.insert_many_ignoring_duplicates(self.collection, batch)
+            self.written += len(batch)
+        except PyMongoError as e:
+            logger.warning("Writing %d %s documents failed (%s), journaling them", len(batch), self.collection, e)
+            self._retry_at = time.monotonic() + RETRY_INTERVAL
+            try:
+                await asyncio.to_thread(self._append_journal, batch)
+            except OSError as e:
+                logger.error("Dropped %d %s documents, the journal is not writable: %s",
+                             len(batch), self.collection, e)
+                return
+            self.journaled += len(batch)
+
+    def _append_journal(self, batch: List[dict]):
+        os.makedirs(self.journal_dir, exist_ok=True)
+        lines = "".join(json_util.dumps(doc, json_options=json_util.CANONICAL_JSON_OPTIONS) + "\n" for doc in batch)
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _claim_journals(self) -> List[str]:
+        """Take over this process's journal and those of processes that are gone
+
+        A journal is claimed by renaming it to `<journal>.replay-<pid>-<n>`,
+        which only one process can do. Journals of live processes are left
+        alone since they may still be appending to them.
+        """
+        claimed = []
+        pattern = os.path.join(self.journal_dir, f"{self.collection}-*.jsonl")
+        for path in sorted(glob.glob(pattern)) + sorted(glob.glob(pattern + ".replay-*")):
+            journal, _, claim = path.partition(".replay-")
+            if claim:
+                owner = int(claim.split("-")[0])
+            else:
+                owner = int(os.path.basename(journal)[len(self.collection) + 1:-len(".jsonl")])
+            if owner == os.getpid() and claim:
+                claimed.append(path)
+                continue
+            if owner != os.getpid() and pid_alive(owner):
+                continue
+            target = f"{journal}.replay-{os.getpid()}-{time.time_ns()}"
+            try:
+                os.rename(path, target)
+            except FileNotFoundError:
+                continue
+            claimed.append(target)
+        return claimed
+
+    async def _replay(self):
+        self._retry_at = time.monotonic() + RETRY_INTERVAL
+        if database.db is None or not os.path.isdir(self.journal_dir):
+            return
+        for path in await asyncio.to_thread(self._claim_journals):
+            docs = await asyncio.to_thread(read_journal, path)
+            try:
+                for i in range(0, len(docs), self.batch_size):
+                    await database.insert_many_ignoring_duplicates(self.collection, docs[i:i + self.batch_size])
+            except PyMongoError as e:
+                # The claim stays with this process for the next attempt
+                logger.warning("Replaying %s failed: %s", path, e)
+                return
+            os.remove(path)
+            self.replayed += len(docs)
+            logger.info("Replayed %d %s documents from %s", len(docs), self.collection, path)
+
+
+def read_journal(path: str) -> List[dict]:
+    """Documents of a journal, skipping lines that do not parse"""
+    docs = []
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                docs.append(json_util.loads(line))
+            except ValueError as e:
+                logger.warning("Skipping unreadable line %d of %s: %s", number, path, e)
+    return docs
+
+
+def pid_alive(pid: int) -> bool:
+    """Whether a process with this pid exists"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+test_results = WriteBehind("testresult")